@@ -2,6 +2,7 @@ from fastapi import Depends, HTTPException, status
 from typing import Dict, Any, List
 from prashne.core.security import get_current_user
 from prashne.core.database import supabase_admin 
+from prashne.core.profiles import get_profile
 
 def require_super_admin(current_user: Dict[str, Any] = Depends(get_current_user)) -> Dict[str, Any]:
     """
@@ -45,6 +46,31 @@ def require_hr_staff(current_user: Dict[str, Any] = Depends(get_current_user)) -
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"HR Staff privileges required. Found: {role}")
     return current_user
 
+def require_company_staff(current_user: Dict[str, Any] = Depends(require_hr_staff)) -> Dict[str, Any]:
+    """
+    HR staff, with 'company_id' attached from the cached profile for tenant-scoped queries.
+    """
+    user_id = current_user.get("sub")
+    try:
+        profile = get_profile(user_id)
+    except Exception as e:
+        print(f"DEBUG: Profile lookup failed for {user_id}: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Could not load user profile")
+
+    current_user["company_id"] = profile.get("company_id") if profile else None
+    return current_user
+
+def tenant_scope(query, current_user: Dict[str, Any]):
+    """
+    Restricts a query to the caller's company, or to their own rows if they have no company.
+    Rows with neither (legacy jobs the backfill couldn't attribute) match no tenant;
+    super admins assign them via /api/admin/unscoped-jobs.
+    """
+    company_id = current_user.get("company_id")
+    if company_id:
+        return query.eq("company_id", company_id)
+    return query.eq("created_by", current_user.get("sub"))
+
 def _get_role_from_metadata(user: Dict[str, Any]) -> str:
     app_meta = user.get("app_metadata", {})
     user_meta = user.get("user_metadata", {})
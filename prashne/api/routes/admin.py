@@ -1,8 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Dict, Any
+import io
+import csv
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, UploadFile, status
+from fastapi.responses import PlainTextResponse
+from typing import List, Dict, Any, Optional, Tuple
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
 from prashne.api.deps import require_super_admin
-from prashne.schemas.admin import CompanyCreate, UserProvision
+from prashne.core.config import settings
+from prashne.schemas.admin import CompanyCreate, UserProvision, BulkUserRow, BulkUserProvision, ProfilingConfig, UnscopedJobAssignment
 from prashne.core.database import supabase_admin, supabase # Use admin client for user creation
+from prashne.services import model_router
+from prashne.core.cache import cache
+from prashne.core import profiling
+from prashne.core import http_cache
+from prashne.core.profiles import invalidate_profile
 
 from prashne.core.security import get_current_user
 
@@ -113,6 +126,7 @@ def provision_user(user_in: UserProvision, admin: Dict[str, Any] = Depends(requi
         }
         
         profile_response = supabase_admin.table("profiles").insert(profile_data).execute()
+        invalidate_profile(new_user.id)
         
         # 3. Send Email
         send_welcome_email(user_in.email, user_in.password, user_in.full_name)
@@ -126,6 +140,245 @@ def provision_user(user_in: UserProvision, admin: Dict[str, Any] = Depends(requi
         print(f"Provisioning Error: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
+def _create_auth_user(row: BulkUserRow, password: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Returns (user_id, error). Runs on the provisioning thread pool.
+    """
+    try:
+        auth_response = supabase_admin.auth.admin.create_user({
+            "email": row.email,
+            "password": password,
+            "email_confirm": True,
+            "user_metadata": {"role": row.role}
+        })
+        if not auth_response.user:
+            return None, "Failed to create auth user"
+        return auth_response.user.id, None
+    except Exception as e:
+        return None, str(e)
+
+def _delete_auth_users(user_ids: List[str]):
+    # Roll back auth users whose profiles could not be written, so a retry starts clean
+    def delete(user_id: str):
+        try:
+            supabase_admin.auth.admin.delete_user(user_id)
+            invalidate_profile(user_id)
+        except Exception as e:
+            print(f"Provisioning Rollback Error ({user_id}): {e}")
+    with ThreadPoolExecutor(max_workers=settings.PROVISION_CONCURRENCY) as pool:
+        list(pool.map(delete, user_ids))
+
+def _find_auth_user_ids(emails: List[str]) -> Dict[str, str]:
+    """
+    Maps lowercased emails to existing auth user ids. The Admin API has no email
+    filter, so this pages through users; only used to repair half-provisioned rows.
+    """
+    wanted = set(emails)
+    found: Dict[str, str] = {}
+    page = 1
+    while wanted - found.keys():
+        users = supabase_admin.auth.admin.list_users(page=page, per_page=1000)
+        if not users:
+            break
+        for user in users:
+            email = (user.email or "").lower()
+            if email in wanted:
+                found[email] = user.id
+        page += 1
+    return found
+
+def _reset_and_welcome(user_id: str, email: str, password: str, full_name: str):
+    try:
+        supabase_admin.auth.admin.update_user_by_id(user_id, {"password": password})
+    except Exception as e:
+        print(f"Provisioning Repair Error ({user_id}): {e}")
+        return
+    send_welcome_email(email, password, full_name)
+
+def _bulk_provision(rows: List[Optional[BulkUserRow]], errors: Dict[int, str],
+                    default_company_id: Optional[str], background_tasks: BackgroundTasks,
+                    reset_passwords: bool = False) -> Dict[str, Any]:
+    """
+    Creates auth users under bounded concurrency, then writes all profiles in one upsert.
+    Idempotent on email: rows whose email already has a profile are reported as 'exists';
+    an auth user left without a profile by an earlier run gets its profile written
+    (its password is only replaced when `reset_passwords` is set).
+    `rows[i]` is None when row i failed validation (reason in `errors[i]`).
+    """
+    results: List[Dict[str, Any]] = [{"row": i, "email": r.email.lower() if r else None} for i, r in enumerate(rows)]
+    for i, detail in errors.items():
+        results[i].update(status="invalid", detail=detail)
+
+    # 1. Dedupe within the payload and resolve companies
+    pending: List[int] = []
+    seen = set()
+    for i, row in enumerate(rows):
+        if row is None:
+            continue
+        email = results[i]["email"]
+        if email in seen:
+            results[i].update(status="duplicate", detail="Email repeated in this request")
+            continue
+        seen.add(email)
+        if not (row.company_id or default_company_id):
+            results[i].update(status="invalid", detail="company_id is required")
+            continue
+        pending.append(i)
+
+    # 2. Skip emails that are already provisioned
+    # (query both spellings: older profiles may store the email as typed)
+    emails = list({e for i in pending for e in (results[i]["email"], rows[i].email)})
+    existing: Dict[str, str] = {}
+    for start in range(0, len(emails), 200):
+        res = supabase_admin.table("profiles").select("id, email").in_("email", emails[start:start + 200]).execute()
+        existing.update({p["email"].lower(): p["id"] for p in res.data or []})
+
+    to_create = []
+    for i in pending:
+        if results[i]["email"] in existing:
+            results[i].update(status="exists", id=existing[results[i]["email"]])
+        else:
+            to_create.append(i)
+
+    # 3. Create auth users concurrently
+    passwords = {i: rows[i].password or secrets.token_urlsafe(12) for i in to_create}
+    with ThreadPoolExecutor(max_workers=settings.PROVISION_CONCURRENCY) as pool:
+        created = list(pool.map(lambda i: _create_auth_user(rows[i], passwords[i]), to_create))
+
+    # Auth users from an earlier run whose profile write failed: adopt their ids
+    orphaned = [i for i, (_, error) in zip(to_create, created) if error and "already" in error.lower()]
+    orphan_ids: Dict[str, str] = {}
+    in_use = set()
+    if orphaned:
+        try:
+            orphan_ids = _find_auth_user_ids([results[i]["email"] for i in orphaned])
+        except Exception as e:
+            print(f"Bulk Provisioning Lookup Error: {e}")
+        # Only adopt ids with no profile at all; anything else is an account in use
+        # whose profile email differs, and must not be moved or demoted
+        candidate_ids = list(set(orphan_ids.values()))
+        for start in range(0, len(candidate_ids), 200):
+            res = supabase_admin.table("profiles").select("id").in_("id", candidate_ids[start:start + 200]).execute()
+            in_use.update(p["id"] for p in res.data or [])
+
+    profiles = []
+    profile_rows = []
+    repaired = set()
+    for i, (user_id, error) in zip(to_create, created):
+        if error:
+            user_id = orphan_ids.get(results[i]["email"]) if i in orphaned else None
+            if user_id in in_use:
+                results[i].update(status="exists", id=user_id, detail="Auth user already has a profile under another email")
+                continue
+            if not user_id:
+                results[i].update(status="failed", detail=error)
+                continue
+            repaired.add(i)
+        row = rows[i]
+        profiles.append({
+            "id": user_id,
+            "email": results[i]["email"],
+            "full_name": row.full_name,
+            "company_id": row.company_id or default_company_id,
+            "role": row.role
+        })
+        profile_rows.append(i)
+
+    # 4. One multi-row profile write for new users; adopted ids are inserted, never
+    #    upserted, so a profile that appeared meanwhile is not overwritten
+    written = []
+    new = [(i, p) for i, p in zip(profile_rows, profiles) if i not in repaired]
+    adopted = [(i, p) for i, p in zip(profile_rows, profiles) if i in repaired]
+    if new:
+        try:
+            supabase_admin.table("profiles").upsert([p for _, p in new], on_conflict="id").execute()
+            written.extend(new)
+        except Exception as e:
+            print(f"Bulk Provisioning Error: {e}")
+            _delete_auth_users([p["id"] for _, p in new])
+            for i, _ in new:
+                results[i].update(status="failed", detail=f"Profile write failed: {e}")
+    if adopted:
+        try:
+            supabase_admin.table("profiles").insert([p for _, p in adopted]).execute()
+            written.extend(adopted)
+        except Exception as e:
+            # Retried on the next run; the auth users are kept
+            print(f"Bulk Provisioning Repair Error: {e}")
+            for i, _ in adopted:
+                results[i].update(status="failed", detail=f"Profile write failed: {e}")
+
+    # 5. Queue welcome emails instead of sending inline
+    for i, profile in written:
+        invalidate_profile(profile["id"])
+        if i in repaired:
+            results[i].update(status="repaired", id=profile["id"])
+            if reset_passwords:
+                # The earlier run's welcome email never went out; issue this run's password
+                background_tasks.add_task(_reset_and_welcome, profile["id"], rows[i].email, passwords[i], rows[i].full_name)
+            else:
+                results[i]["detail"] = "Existing password kept; re-run with reset_passwords to issue a new one"
+            continue
+        results[i].update(status="created", id=profile["id"])
+        background_tasks.add_task(send_welcome_email, rows[i].email, passwords[i], rows[i].full_name)
+
+    summary: Dict[str, int] = {}
+    for r in results:
+        summary[r["status"]] = summary.get(r["status"], 0) + 1
+    return {"summary": summary, "results": results}
+
+@router.post("/users/bulk")
+def bulk_provision_users(
+    payload: BulkUserProvision,
+    background_tasks: BackgroundTasks,
+    admin: Dict[str, Any] = Depends(require_super_admin)
+):
+    """
+    Provision many users at once (JSON). Returns a per-row outcome:
+    created | repaired | exists | duplicate | invalid | failed.
+    """
+    try:
+        return _bulk_provision(payload.users, {}, payload.company_id, background_tasks, payload.reset_passwords)
+    except Exception as e:
+        print(f"Bulk Provisioning Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/users/bulk/csv")
+async def bulk_provision_users_csv(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    company_id: Optional[str] = None,
+    reset_passwords: bool = False,
+    admin: Dict[str, Any] = Depends(require_super_admin)
+):
+    """
+    Provision many users from a CSV with columns: email, full_name, company_id, role, password.
+    Only email and full_name are required; invalid rows are reported, not fatal.
+    """
+    content = (await file.read()).decode("utf-8-sig")
+    reader = csv.DictReader(io.StringIO(content))
+
+    rows: List[Optional[BulkUserRow]] = []
+    errors: Dict[int, str] = {}
+    for i, record in enumerate(reader):
+        record = {k.strip().lower(): (v or "").strip() for k, v in record.items() if k}
+        try:
+            rows.append(BulkUserRow(**{k: v for k, v in record.items() if v}))
+        except ValidationError as e:
+            rows.append(None)
+            errors[i] = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+
+    if not rows:
+        raise HTTPException(status_code=400, detail="CSV has no rows")
+    if len(rows) > 1000:
+        raise HTTPException(status_code=400, detail="At most 1000 users per upload")
+
+    try:
+        return await run_in_threadpool(_bulk_provision, rows, errors, company_id, background_tasks, reset_passwords)
+    except Exception as e:
+        print(f"Bulk Provisioning Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/stats")
 def get_global_stats(admin: Dict[str, Any] = Depends(require_super_admin)):
     """
@@ -152,3 +405,97 @@ def get_global_stats(admin: Dict[str, Any] = Depends(require_super_admin)):
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/unscoped-jobs")
+def list_unscoped_jobs(admin: Dict[str, Any] = Depends(require_super_admin)):
+    """
+    Legacy jobs with no company or creator. Tenant-scoped routes can't see them
+    until they are assigned to a company.
+    """
+    res = supabase_admin.table("jobs")\
+        .select("id, title, created_at")\
+        .is_("company_id", "null")\
+        .is_("created_by", "null")\
+        .order("created_at", desc=True)\
+        .execute()
+    return res.data or []
+
+@router.post("/unscoped-jobs/assign")
+def assign_unscoped_jobs(assignment: UnscopedJobAssignment, admin: Dict[str, Any] = Depends(require_super_admin)):
+    """
+    Moves unscoped legacy jobs into a company. Jobs that already have an owner are left alone.
+    """
+    query = supabase_admin.table("jobs")\
+        .update({"company_id": assignment.company_id})\
+        .is_("company_id", "null")\
+        .is_("created_by", "null")
+    if assignment.job_ids is not None:
+        query = query.in_("id", assignment.job_ids)
+    try:
+        res = query.execute()
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    http_cache.bump_version(http_cache.tenant_key({"company_id": assignment.company_id}))
+    return {"assigned": len(res.data or []), "company_id": assignment.company_id}
+
+@router.get("/model-metrics")
+def get_model_metrics(admin: Dict[str, Any] = Depends(require_super_admin)):
+    """
+    Per task/tier LLM latency, token usage and escalation counts (this worker only).
+    """
+    return {
+        "tiers": model_router.MODEL_TIERS,
+        "routing": model_router.TASK_TIERS,
+        "metrics": model_router.get_metrics()
+    }
+
+@router.delete("/model-metrics")
+def reset_model_metrics(admin: Dict[str, Any] = Depends(require_super_admin)):
+    model_router.reset_metrics()
+    return {"message": "Model metrics reset"}
+
+@router.delete("/cache/{namespace}")
+def invalidate_cache_namespace(namespace: str, admin: Dict[str, Any] = Depends(require_super_admin)):
+    """
+    Drops every entry in a cache namespace (e.g. 'match' after a prompt change) on all workers.
+    """
+    cache.namespace(namespace).invalidate()
+    return {"message": f"Cache namespace '{namespace}' invalidated", "backend": type(cache.backend).__name__}
+
+@router.get("/profiling")
+async def get_profiling(admin: Dict[str, Any] = Depends(require_super_admin)):
+    """
+    Profiler config, event-loop lag, executor queue depth and recent captures (this worker only).
+    """
+    return {
+        "config": profiling.state.as_dict(),
+        "runtime": profiling.runtime_stats(),
+        "profiles": profiling.list_profiles()
+    }
+
+@router.put("/profiling")
+async def configure_profiling(config: ProfilingConfig, admin: Dict[str, Any] = Depends(require_super_admin)):
+    """
+    Enable/disable sampling for a route prefix and/or a fraction of requests.
+    With slow_ms set, only requests slower than the threshold are kept.
+    """
+    profiling.state.configure(**config.model_dump())
+    if config.enabled:
+        profiling.loop_lag.ensure_running()
+    return profiling.state.as_dict()
+
+@router.get("/profiling/profiles/{profile_id}", response_class=PlainTextResponse)
+def get_profile_folded(profile_id: int, admin: Dict[str, Any] = Depends(require_super_admin)):
+    """
+    Collapsed stacks for one capture; pipe into flamegraph.pl or open in speedscope.
+    """
+    folded = profiling.get_folded(profile_id)
+    if folded is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return folded
+
+@router.delete("/profiling/profiles")
+def clear_profiles(admin: Dict[str, Any] = Depends(require_super_admin)):
+    profiling.clear_profiles()
+    return {"message": "Profiles cleared"}
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from typing import Dict, Any, List
 from prashne.core.database import supabase_admin
+from prashne.core.profiles import get_profile
 from prashne.api.deps import require_hr_admin
 from collections import Counter
 
@@ -14,12 +15,12 @@ def get_leaderboard(current_user: Dict[str, Any] = Depends(require_hr_admin)):
     """
     # 1. Get current admin's company ID
     user_id = current_user.get("sub")
-    profile_res = supabase_admin.table("profiles").select("company_id").eq("id", user_id).single().execute()
+    profile = get_profile(user_id)
     
-    if not profile_res.data:
+    if not profile:
         raise HTTPException(status_code=404, detail="Admin profile not found")
         
-    company_id = profile_res.data.get("company_id")
+    company_id = profile.get("company_id")
     if not company_id:
         return [] # No company, no team to show
         
@@ -1,20 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from typing import Dict, Any
+from prashne.core.config import settings
 from prashne.core.security import get_current_user
-from prashne.core.database import supabase
-from prashne.schemas.auth import LoginRequest
+from prashne.core.database import supabase, create_auth_client
+from prashne.core.profiles import get_profile
+from prashne.core.rate_limit import SlidingWindowLimiter, client_ip, enforce
+from prashne.schemas.auth import LoginRequest, RefreshRequest
 
 router = APIRouter()
 
+# Login limiters count failed attempts only, so nobody can lock a user out by
+# sending requests for their email; the strict limit is per (client, email)
+login_pair_limiter = SlidingWindowLimiter(settings.LOGIN_MAX_FAILURES_PER_IP_EMAIL, settings.LOGIN_WINDOW_SECONDS)
+login_ip_limiter = SlidingWindowLimiter(settings.LOGIN_MAX_FAILURES_PER_IP, settings.LOGIN_WINDOW_SECONDS)
+login_email_limiter = SlidingWindowLimiter(settings.LOGIN_MAX_FAILURES_PER_EMAIL, settings.LOGIN_WINDOW_SECONDS)
+refresh_ip_limiter = SlidingWindowLimiter(settings.REFRESH_MAX_PER_IP, settings.LOGIN_WINDOW_SECONDS)
+
+def _session_response(session, user) -> Dict[str, Any]:
+    # Role from Profiles (Source of Truth), via the profile cache
+    try:
+        profile = get_profile(user.id)
+        role = profile.get("role") if profile else "hr_user"
+    except Exception as e:
+        # Fallback if profile missing (should not happen in prod)
+        print(f"Profile Lookup Error ({user.id}): {e}")
+        role = "hr_user"
+
+    return {
+        "access_token": session.access_token,
+        "refresh_token": session.refresh_token,
+        "user": {
+            "id": user.id,
+            "email": user.email,
+            "role": role or "hr_user"
+        }
+    }
+
 @router.post("/login")
-def login(credentials: LoginRequest):
+def login(credentials: LoginRequest, request: Request):
     """
     Proxy Login: Authenticates with Supabase via Backend.
     Returns Access Token + Role from DB.
     """
+    ip = client_ip(request)
+    email = credentials.email.lower()
+    pair = f"{ip}|{email}"
+    for limiter, key in ((login_pair_limiter, pair), (login_ip_limiter, ip), (login_email_limiter, email)):
+        enforce(limiter, key)
+
     try:
         # 1. Auth with Supabase
-        auth_response = supabase.auth.sign_in_with_password({
+        auth_response = create_auth_client().auth.sign_in_with_password({
             "email": credentials.email,
             "password": credentials.password
         })
@@ -25,33 +61,47 @@ def login(credentials: LoginRequest):
         if not session or not user:
             raise HTTPException(status_code=401, detail="Authentication failed")
 
-        # 2. Fetch Role from Profiles (Source of Truth)
-        try:
-            profile_response = supabase.table("profiles").select("role").eq("id", user.id).single().execute()
-            role = profile_response.data.get("role") if profile_response.data else "hr_user"
-        except:
-             # Fallback if profile missing (should not happen in prod)
-             role = "hr_user"
-
-        return {
-            "access_token": session.access_token,
-            "refresh_token": session.refresh_token,
-            "user": {
-                "id": user.id,
-                "email": user.email,
-                "role": role
-            }
-        }
-
+    except HTTPException:
+        raise
     except Exception as e:
         # Check for specific Supabase error messages
         error_msg = str(e)
         if "Invalid login credentials" in error_msg:
-             raise HTTPException(status_code=401, detail="Invalid email or password")
+            login_pair_limiter.hit(pair)
+            login_ip_limiter.hit(ip)
+            login_email_limiter.hit(email)
+            raise HTTPException(status_code=401, detail="Invalid email or password")
         
         print(f"Login Error: {error_msg}")
         raise HTTPException(status_code=400, detail=error_msg)
 
+    # 2. Fetch Role (cached, so a repeat login costs no profiles query)
+    login_pair_limiter.reset(pair)
+    return _session_response(session, user)
+
+@router.post("/refresh")
+def refresh(body: RefreshRequest, request: Request):
+    """
+    Exchanges the refresh_token returned by /login for a new session,
+    so clients can renew access without re-sending the password.
+    """
+    ip = client_ip(request)
+    enforce(refresh_ip_limiter, ip)
+    refresh_ip_limiter.hit(ip)
+
+    try:
+        auth_response = create_auth_client().auth.refresh_session(body.refresh_token)
+    except Exception as e:
+        print(f"Refresh Error: {e}")
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+
+    session = auth_response.session
+    user = auth_response.user
+    if not session or not user:
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+
+    return _session_response(session, user)
+
 @router.get("/me", response_model=Dict[str, Any])
 def validate_token(current_user: Dict[str, Any] = Depends(get_current_user)) -> Dict[str, Any]:
     """
@@ -1,66 +1,173 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+import asyncio
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
 from prashne.core.database import supabase_admin
-from prashne.api.deps import require_hr_staff
+from prashne.core.write_buffer import match_writer
+from prashne.core import http_cache
+from prashne.api.deps import require_hr_staff, require_company_staff, tenant_scope
 
 router = APIRouter()
 
 from prashne.schemas.jobs import JobCreate, MatchRequest, MatchResult
-from prashne.services.ai_matching import batch_match_resumes
+from prashne.services.ai_matching import batch_match_resumes, stream_match_resumes
+from prashne.services.prescoring import JOB_COLUMNS, job_to_jd_text, schedule_job_prescore
+from prashne.services.lifecycle import delete_jobs
+from prashne.services.candidate_profile import CANDIDATE_COLUMNS, hydrate_candidate_profiles
+from prashne.schemas.common import BulkDeleteRequest
+
+def _load_match_candidates(request: MatchRequest, user_id: str) -> List[Dict[str, Any]]:
+    query = supabase_admin.table("resumes").select(CANDIDATE_COLUMNS).eq("created_by", user_id)
+    
+    if request.candidate_ids:
+        query = query.in_("id", request.candidate_ids)
+        
+    return hydrate_candidate_profiles(query.execute().data or [])
+
+def _match_saver(request: MatchRequest, current_user: Dict[str, Any]):
+    # Each score is handed to the write-behind buffer as soon as it arrives
+    def save_match(r: Dict[str, Any]):
+        match_writer.add({
+            "job_id": request.job_id,
+            "resume_id": r["candidate_id"],
+            "match_score": r["score"],
+            "match_reason": r["reason"],
+            "created_by": current_user.get("sub"),
+            "company_id": current_user.get("company_id")
+        })
+    return save_match
 
 @router.post("/match", response_model=List[MatchResult])
-async def match_candidates(request: MatchRequest, current_user: Dict[str, Any] = Depends(require_hr_staff)):
+async def match_candidates(request: MatchRequest, current_user: Dict[str, Any] = Depends(require_company_staff)):
     try:
         user_id = current_user.get("sub")
-        query = supabase_admin.table("resumes").select("*").eq("created_by", user_id)
-        
-        if request.candidate_ids:
-            query = query.in_("id", request.candidate_ids)
-            
-        res = query.execute()
-        resumes = res.data
+        resumes = _load_match_candidates(request, user_id)
         
         if not resumes:
             return []
-            
-        results = await batch_match_resumes(resumes, request.jd_text)
-        
-        matches_to_insert = []
-        for r in results:
-            match_entry = {
-                "job_id": request.job_id,
-                "resume_id": r["candidate_id"],
-                "match_score": r["score"],
-                "match_reason": r["reason"],
-                "created_by": user_id
-            }
-            matches_to_insert.append(match_entry)
-
-        if matches_to_insert:
-            try:
-                supabase_admin.table("matches").upsert(matches_to_insert, on_conflict="job_id,resume_id").execute()
-            except Exception as e:
-                print(f"Failed to save matches: {e}")
+
+        results = await batch_match_resumes(resumes, request.jd_text, on_result=_match_saver(request, current_user))
+
+        # Make sure this request's matches are written (or journaled) before responding
+        loop = asyncio.get_event_loop()
+        if not (await loop.run_in_executor(None, match_writer.flush)).ok:
+            print("Matches journaled locally; they will be replayed once Supabase recovers")
         
         return results
     except Exception as e:
         print(f"Smart Match Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/match/stream")
+async def stream_match_candidates(
+    request: MatchRequest,
+    http_request: Request,
+    current_user: Dict[str, Any] = Depends(require_company_staff)
+):
+    """
+    Streaming variant of /match. Emits one event per candidate as soon as it is scored:
+      start   -> {"total"}
+      result  -> {"result", "rank", "completed", "total", "top"}  (rank among results so far)
+      summary -> {"results"}  (final list, sorted by score)
+    NDJSON by default, Server-Sent Events when the client sends Accept: text/event-stream.
+    Disconnecting (checked every second, not just between results) stops queued
+    candidates and large-tier final passes; Groq calls already running still finish.
+    """
+    user_id = current_user.get("sub")
+    try:
+        resumes = _load_match_candidates(request, user_id)
+    except Exception as e:
+        print(f"Smart Match Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    use_sse = "text/event-stream" in http_request.headers.get("accept", "")
+
+    def encode(event: str, payload: Dict[str, Any]) -> str:
+        if use_sse:
+            return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+        return json.dumps({"event": event, **payload}) + "\n"
+
+    async def event_stream():
+        total = len(resumes)
+        completed: List[Dict[str, Any]] = []
+        yield encode("start", {"total": total})
+
+        cancel = asyncio.Event()
+
+        async def watch_disconnect():
+            while not cancel.is_set():
+                if await http_request.is_disconnected():
+                    print(f"Smart Match Stream: client disconnected after {len(completed)}/{total}")
+                    cancel.set()
+                    return
+                await asyncio.sleep(1)
+
+        watcher = asyncio.ensure_future(watch_disconnect())
+        results = stream_match_resumes(resumes, request.jd_text, on_result=_match_saver(request, current_user), cancel=cancel)
+        try:
+            async for r in results:
+                result = MatchResult(**r).model_dump()
+                completed.append(result)
+                completed.sort(key=lambda x: x["score"], reverse=True)
+                yield encode("result", {
+                    "result": result,
+                    "rank": completed.index(result) + 1,
+                    "completed": len(completed),
+                    "total": total,
+                    "top": [{"candidate_id": c["candidate_id"], "score": c["score"]} for c in completed[:10]]
+                })
+            if not cancel.is_set():
+                yield encode("summary", {"results": completed})
+        finally:
+            # Cancels queued scoring if we stopped early
+            watcher.cancel()
+            await results.aclose()
+
+    media_type = "text/event-stream" if use_sse else "application/x-ndjson"
+    return StreamingResponse(event_stream(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
 @router.get("/matches")
-def get_match_history(current_user: Dict[str, Any] = Depends(require_hr_staff)):
+def get_match_history(request: Request, current_user: Dict[str, Any] = Depends(require_company_staff)):
+    etag = http_cache.compute_etag(request, current_user)
+    cached = http_cache.not_modified(request, etag)
+    if cached:
+        return cached
     try:
-        res = supabase_admin.table("matches")\
-            .select("*, job:jobs(title), resume:resumes(candidate_name)")\
+        query = supabase_admin.table("matches")\
+            .select("*, job:jobs(title), resume:resumes(candidate_name)")
+        res = tenant_scope(query, current_user)\
             .order("created_at", desc=True)\
             .limit(100)\
             .execute()
-        return res.data
+        return http_cache.json_response(request, res.data, etag)
     except Exception as e:
         print(f"Fetch Matches Error: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch history")
 
+@router.get("/{job_id}/shortlist")
+def get_job_shortlist(job_id: str, request: Request, limit: int = 50, current_user: Dict[str, Any] = Depends(require_company_staff)):
+    """
+    Ranked candidates for a job, served from precomputed matches.
+    """
+    etag = http_cache.compute_etag(request, current_user)
+    cached = http_cache.not_modified(request, etag)
+    if cached:
+        return cached
+    try:
+        query = supabase_admin.table("matches")\
+            .select("resume_id, match_score, match_reason, created_at, resume:resumes(candidate_name, email)")\
+            .eq("job_id", job_id)
+        res = tenant_scope(query, current_user)\
+            .order("match_score", desc=True)\
+            .limit(min(max(limit, 1), 200))\
+            .execute()
+        return http_cache.json_response(request, res.data, etag)
+    except Exception as e:
+        print(f"Fetch Shortlist Error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch shortlist")
+
 @router.post("/generate")
 def generate_job(prompt: dict, current_user: Dict[str, Any] = Depends(require_hr_staff)):
     user_prompt = prompt.get("prompt")
@@ -74,41 +181,74 @@ def generate_job(prompt: dict, current_user: Dict[str, Any] = Depends(require_hr
     return result
 
 @router.post("/")
-def create_job(job: JobCreate, current_user: Dict[str, Any] = Depends(require_hr_staff)):
+def create_job(job: JobCreate, background_tasks: BackgroundTasks, current_user: Dict[str, Any] = Depends(require_company_staff)):
     try:
         job_data = job.model_dump()
+        job_data["company_id"] = current_user.get("company_id")
+        job_data["created_by"] = current_user.get("sub")
         res = supabase_admin.table("jobs").insert(job_data).execute()
+        http_cache.bump_tenant(current_user)
+        # Score the candidate pool in the background so the shortlist is ready when the job is opened
+        background_tasks.add_task(schedule_job_prescore, res.data[0], current_user.get("company_id"), current_user.get("sub"))
         return res.data[0]
     except Exception as e:
         print(f"Create Job Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/")
-def get_jobs(current_user: Dict[str, Any] = Depends(require_hr_staff)):
+def get_jobs(request: Request, current_user: Dict[str, Any] = Depends(require_company_staff)):
+    etag = http_cache.compute_etag(request, current_user)
+    cached = http_cache.not_modified(request, etag)
+    if cached:
+        return cached
     try:
-        res = supabase_admin.table("jobs").select("*").order("created_at", desc=True).execute()
-        return res.data
+        query = supabase_admin.table("jobs").select("*")
+        res = tenant_scope(query, current_user).order("created_at", desc=True).execute()
+        return http_cache.json_response(request, res.data, etag)
     except Exception as e:
         print(f"Fetch Jobs Error: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch jobs")
 
 @router.delete("/{job_id}")
-def delete_job(job_id: str, current_user: Dict[str, Any] = Depends(require_hr_staff)):
+def delete_job(job_id: str, current_user: Dict[str, Any] = Depends(require_company_staff)):
     try:
-        res = supabase_admin.table("jobs").delete().eq("id", job_id).execute()
+        delete_jobs([job_id], current_user)
         return {"message": "Job deleted"}
     except Exception as e:
         print(f"Delete Job Error: {e}")
         raise HTTPException(status_code=500, detail="Failed to delete job")
 
+@router.post("/bulk-delete")
+def bulk_delete_jobs(payload: BulkDeleteRequest, current_user: Dict[str, Any] = Depends(require_company_staff)):
+    """
+    Deletes many jobs at once; their matches are cleaned up in the background.
+    """
+    try:
+        return delete_jobs(payload.ids, current_user)
+    except Exception as e:
+        print(f"Bulk Delete Jobs Error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to delete jobs")
+
 @router.put("/{job_id}")
-def update_job(job_id: str, job: JobCreate, current_user: Dict[str, Any] = Depends(require_hr_staff)):
+def update_job(job_id: str, job: JobCreate, background_tasks: BackgroundTasks, current_user: Dict[str, Any] = Depends(require_company_staff)):
     try:
         job_data = job.model_dump()
-        res = supabase_admin.table("jobs").update(job_data).eq("id", job_id).execute()
+        query = supabase_admin.table("jobs").select(JOB_COLUMNS).eq("id", job_id)
+        before = tenant_scope(query, current_user).limit(1).execute()
+        if not before.data:
+             raise HTTPException(status_code=404, detail="Job not found")
+
+        query = supabase_admin.table("jobs").update(job_data).eq("id", job_id)
+        res = tenant_scope(query, current_user).execute()
         if not res.data:
              raise HTTPException(status_code=404, detail="Job not found")
+        http_cache.bump_tenant(current_user)
+        # Only a changed JD invalidates the stored scores; edits to other fields keep them
+        if job_to_jd_text(before.data[0]) != job_to_jd_text(res.data[0]):
+            background_tasks.add_task(schedule_job_prescore, res.data[0], current_user.get("company_id"), current_user.get("sub"), True)
         return res.data[0]
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Update Job Error: {e}")
         raise HTTPException(status_code=500, detail="Failed to update job")
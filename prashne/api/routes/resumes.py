@@ -1,20 +1,30 @@
 import json
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, status
+import uuid
+import asyncio
+from fastapi import APIRouter, BackgroundTasks, UploadFile, File, Depends, HTTPException, Request, status
 from typing import Dict, Any, List
 from prashne.core.database import supabase_admin
+from prashne.core.write_buffer import resume_writer
+from prashne.core import http_cache
 from prashne.services.pdf_service import extract_text_from_pdf
 from prashne.services.groq_service import parse_resume_with_ai
-from prashne.api.deps import require_hr_staff
+from prashne.api.deps import require_company_staff
 from prashne.services.cloudinary_service import upload_file_to_cloudinary
+from prashne.services.prescoring import schedule_resume_prescore
+from prashne.services.lifecycle import delete_resumes
+from prashne.services.candidate_profile import build_candidate_profile
+from prashne.schemas.common import BulkDeleteRequest
 
 router = APIRouter()
 
 @router.post("/upload")
 async def upload_resumes(
+    background_tasks: BackgroundTasks,
     files: List[UploadFile] = File(...),
-    current_user: Dict[str, Any] = Depends(require_hr_staff)
+    current_user: Dict[str, Any] = Depends(require_company_staff)
 ):
     results = []
+    entries = []
     
     for file in files:
         if file.content_type != "application/pdf":
@@ -44,40 +54,73 @@ async def upload_resumes(
                 if "error" in parsed_data:
                      parsed_data = {}
 
-            # Prepare DB Entry
+            # Prepare DB Entry (id generated here so it can be returned before the batched write lands)
+            resume_id = str(uuid.uuid4())
+            candidate_name = parsed_data.get("full_name") or "Unknown"
+            experience_years = parsed_data.get("experience_years") if isinstance(parsed_data.get("experience_years"), (int, float)) else 0
             resume_entry = {
-                "candidate_name": parsed_data.get("full_name") or "Unknown",
+                "id": resume_id,
+                "candidate_name": candidate_name,
                 "email": parsed_data.get("email"),
                 "phone": parsed_data.get("phone"),
                 "skills": parsed_data.get("skills") if isinstance(parsed_data.get("skills"), list) else [],
-                "experience_years": parsed_data.get("experience_years") if isinstance(parsed_data.get("experience_years"), (int, float)) else 0,
+                "experience_years": experience_years,
                 "education": json.dumps(parsed_data.get("education")) if parsed_data.get("education") else None,
                 "cloudinary_url": cloudinary_url,
                 "raw_ai_response": parsed_data,
-                "created_by": current_user.get("sub")
+                # Prompt-ready summary used by matching instead of the raw parse
+                "candidate_profile": build_candidate_profile(parsed_data, candidate_name, experience_years),
+                "created_by": current_user.get("sub"),
+                "company_id": current_user.get("company_id")
             }
             
-            try:
-                 db_res = supabase_admin.table("resumes").insert(resume_entry).execute()
-                 results.append({
-                     "filename": file.filename, 
-                     "status": "success", 
-                     "id": db_res.data[0]['id'],
-                     "parsed": parsed_data
-                 })
-            except Exception as e:
-                 print(f"DEBUG: DB Save Error: {e}")
-                 results.append({"filename": file.filename, "error": f"DB Error: {str(e)}"})
+            entries.append(resume_entry)
+            results.append({
+                "filename": file.filename, 
+                "status": "success", 
+                "id": resume_id,
+                "parsed": parsed_data
+            })
         
         except Exception as e:
             print(f"File Processing Error: {e}")
             results.append({"filename": file.filename, "error": str(e)})
 
+    # One multi-row write for the whole upload instead of one insert per file
+    if entries:
+        loop = asyncio.get_event_loop()
+        outcome = await loop.run_in_executor(None, resume_writer.write, entries)
+
+        rejected = {row["id"]: error for row, error in outcome.rejected}
+        for i, r in enumerate(results):
+            if r.get("id") in rejected:
+                print(f"DEBUG: DB Save Error: {rejected[r['id']]}")
+                results[i] = {"filename": r["filename"], "error": f"DB Error: {rejected[r['id']]}"}
+
+        saved_ids = [e["id"] for e in entries if e["id"] not in rejected]
+        if not outcome.ok:
+            print("DEBUG: DB Save deferred, resumes journaled locally")
+            for r in results:
+                if r.get("status") == "success":
+                    r["status"] = "queued"
+        elif saved_ids:
+            # Score the new candidates against open jobs once the response is sent
+            background_tasks.add_task(
+                schedule_resume_prescore,
+                saved_ids,
+                current_user.get("company_id"),
+                current_user.get("sub")
+            )
+
     return {"uploaded": results}
 
 @router.get("/")
-def get_resumes(current_user: Dict[str, Any] = Depends(require_hr_staff)):
+def get_resumes(request: Request, current_user: Dict[str, Any] = Depends(require_company_staff)):
     user_id = current_user.get("sub")
+    etag = http_cache.compute_etag(request, current_user)
+    cached = http_cache.not_modified(request, etag)
+    if cached:
+        return cached
     try:
         # HR Staff sees only their own resumes? Or all? 
         # Usually staff sees all in a team, but filtering by 'created_by' keeps it personal for now (My Activity).
@@ -87,26 +130,41 @@ def get_resumes(current_user: Dict[str, Any] = Depends(require_hr_staff)):
             .eq("created_by", user_id)\
             .order("created_at", desc=True)\
             .execute()
-        return res.data
+        return http_cache.json_response(request, res.data, etag)
     except Exception as e:
         print(f"Fetch Error: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch resumes")
 
 @router.get("/stats")
-def get_resume_stats(current_user: Dict[str, Any] = Depends(require_hr_staff)):
+def get_resume_stats(request: Request, current_user: Dict[str, Any] = Depends(require_company_staff)):
     user_id = current_user.get("sub")
+    etag = http_cache.compute_etag(request, current_user)
+    cached = http_cache.not_modified(request, etag)
+    if cached:
+        return cached
     count = 0
     try:
         res = supabase_admin.table("resumes").select("id", count="exact").eq("created_by", user_id).execute()
         count = res.count
     except:
         count = 0 
-    return {"total_parsed": count}
+    return http_cache.json_response(request, {"total_parsed": count}, etag)
 
 @router.delete("/{resume_id}")
-def delete_resume(resume_id: str, current_user: Dict[str, Any] = Depends(require_hr_staff)):
+def delete_resume(resume_id: str, current_user: Dict[str, Any] = Depends(require_company_staff)):
     try:
-        supabase_admin.table("resumes").delete().eq("id", resume_id).execute()
+        delete_resumes([resume_id], current_user)
         return {"message": "Deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/bulk-delete")
+def bulk_delete_resumes(payload: BulkDeleteRequest, current_user: Dict[str, Any] = Depends(require_company_staff)):
+    """
+    Deletes many resumes at once; matches and stored PDFs are cleaned up in the background.
+    """
+    try:
+        return delete_resumes(payload.ids, current_user)
+    except Exception as e:
+        print(f"Bulk Delete Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
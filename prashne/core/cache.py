@@ -0,0 +1,286 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+from prashne.core.config import settings
+
+# ---------------------------------------------------------------------------
+# Backends: raw bytes + TTL + atomic counters
+# ---------------------------------------------------------------------------
+
+def _counter_seed() -> int:
+    # Counters that have to be recreated (restart, invalidation) start from the clock,
+    # so a recreated counter never hands out a value an old one already used
+    return int(time.time() * 1_000_000)
+
+class CacheBackend:
+    """
+    Minimal storage interface every backend implements.
+    `shared` is True when other processes see the same data.
+    Counters (incr) never expire or get evicted; a missing counter starts from
+    a clock-based seed rather than 1.
+    """
+    shared = False
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+class MemoryBackend(CacheBackend):
+    """
+    Per-process LRU. The default, and the only option that needs no setup.
+    Counters are kept apart from the LRU so cached values can't evict them.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[Optional[float], bytes]]" = OrderedDict()
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key in self._counters:
+                return str(self._counters[key]).encode()
+            hit = self._data.get(key)
+            if hit is None:
+                return None
+            expires, value = hit
+            if expires is not None and expires <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        expires = time.time() + ttl if ttl else None
+        with self._lock:
+            self._counters.pop(key, None)
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+            self._counters.pop(key, None)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            new_value = self._counters[key] + 1 if key in self._counters else _counter_seed()
+            self._counters[key] = new_value
+            return new_value
+
+class SQLiteBackend(CacheBackend):
+    """
+    File-backed cache in WAL mode, shared by every worker on the same host.
+    """
+    shared = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_expires_idx ON cache (expires)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._conn().execute(
+            "SELECT value FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            (key, time.time())
+        ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        expires = time.time() + ttl if ttl else None
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO cache (key, value, expires) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires = excluded.expires",
+            (key, value, expires)
+        )
+        self._writes += 1
+        if self._writes % 1000 == 0:
+            conn.execute("DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?", (time.time(),))
+
+    def delete(self, key: str):
+        self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def incr(self, key: str) -> int:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+            new_value = int(row[0]) + 1 if row else _counter_seed()
+            conn.execute(
+                "INSERT INTO cache (key, value, expires) VALUES (?, ?, NULL) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires = NULL",
+                (key, str(new_value).encode())
+            )
+            conn.execute("COMMIT")
+            return new_value
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+class RedisBackend(CacheBackend):
+    """
+    Any Redis-protocol server (Redis, Valkey, KeyDB, Upstash). Requires the `redis` package.
+    """
+    shared = True
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package (pip install redis)")
+        self._client = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        if ttl:
+            self._client.set(key, value, px=max(1, int(ttl * 1000)))
+        else:
+            self._client.set(key, value)
+
+    def delete(self, key: str):
+        self._client.delete(key)
+
+    def incr(self, key: str) -> int:
+        self._client.set(key, _counter_seed() - 1, nx=True)
+        return int(self._client.incr(key))
+
+# ---------------------------------------------------------------------------
+# Namespaced JSON cache on top of a backend
+# ---------------------------------------------------------------------------
+
+class Namespace:
+    """
+    JSON values under `<prefix>:<name>:<generation>:<key>`.
+    invalidate() bumps the generation counter in the backend, which drops every
+    key in the namespace for all workers at the cost of a single INCR.
+    """
+
+    def __init__(self, cache: "Cache", name: str):
+        self.cache = cache
+        self.name = name
+        self._generation: Optional[int] = None
+        self._generation_checked = 0.0
+
+    def _gen_key(self) -> str:
+        return f"{self.cache.prefix}:{self.name}:__gen__"
+
+    def _current_generation(self) -> int:
+        # Re-read at most every CACHE_GENERATION_REFRESH_SECONDS; bounds cross-worker staleness
+        now = time.monotonic()
+        if self._generation is None or now - self._generation_checked >= self.cache.generation_refresh:
+            raw = self.cache.backend.get(self._gen_key())
+            self._generation = int(raw) if raw else 0
+            self._generation_checked = now
+        return self._generation
+
+    def _key(self, key: str) -> str:
+        return f"{self.cache.prefix}:{self.name}:{self._current_generation()}:{key}"
+
+    def get(self, key: str) -> Any:
+        try:
+            raw = self.cache.backend.get(self._key(key))
+            return json.loads(raw) if raw is not None else None
+        except Exception as e:
+            print(f"Cache Get Error ({self.name}): {e}")
+            return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        try:
+            self.cache.backend.set(self._key(key), json.dumps(value, default=str).encode(), ttl)
+        except Exception as e:
+            print(f"Cache Set Error ({self.name}): {e}")
+
+    def delete(self, key: str):
+        try:
+            self.cache.backend.delete(self._key(key))
+        except Exception as e:
+            print(f"Cache Delete Error ({self.name}): {e}")
+
+    def incr(self, key: str) -> int:
+        return self.cache.backend.incr(self._key(key))
+
+    def counter(self, key: str) -> int:
+        raw = self.cache.backend.get(self._key(key))
+        return int(raw) if raw else 0
+
+    def invalidate(self):
+        try:
+            self._generation = self.cache.backend.incr(self._gen_key())
+            self._generation_checked = time.monotonic()
+        except Exception as e:
+            print(f"Cache Invalidate Error ({self.name}): {e}")
+
+class Cache:
+    def __init__(self, backend: CacheBackend, prefix: str, generation_refresh: float):
+        self.backend = backend
+        self.prefix = prefix
+        self.generation_refresh = generation_refresh
+        self._namespaces: Dict[str, Namespace] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self) -> bool:
+        return self.backend.shared
+
+    def namespace(self, name: str) -> Namespace:
+        with self._lock:
+            if name not in self._namespaces:
+                self._namespaces[name] = Namespace(self, name)
+            return self._namespaces[name]
+
+def hash_key(*parts: Any) -> str:
+    """
+    Stable digest for building cache keys from large inputs (tokens, resume text, prompts).
+    """
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else str(part).encode())
+        h.update(b"\x00")
+    return h.hexdigest()
+
+def create_backend(kind: str, url: str) -> CacheBackend:
+    if kind == "sqlite":
+        return SQLiteBackend(url or "/tmp/prashne-cache.sqlite3")
+    if kind == "redis":
+        return RedisBackend(url or "redis://localhost:6379/0")
+    return MemoryBackend()
+
+cache = Cache(
+    create_backend(settings.CACHE_BACKEND, settings.CACHE_URL),
+    prefix=settings.CACHE_PREFIX,
+    generation_refresh=settings.CACHE_GENERATION_REFRESH_SECONDS
+)
@@ -10,6 +10,57 @@ class Settings(BaseSettings):
     CLOUDINARY_API_KEY: str
     CLOUDINARY_API_SECRET: str
 
+    # Caching
+    CACHE_BACKEND: str = "memory"   # "memory" | "sqlite" (workers on one host) | "redis" (shared)
+    CACHE_URL: str = ""             # SQLite file path or redis:// URL
+    CACHE_PREFIX: str = "prashne"
+    CACHE_GENERATION_REFRESH_SECONDS: float = 1.0  # Max delay before a namespace invalidation is seen by other workers
+    PROFILE_CACHE_TTL_SECONDS: int = 300
+    JWT_CACHE_TTL_SECONDS: int = 300
+    PARSE_CACHE_TTL_SECONDS: int = 86400
+    MATCH_CACHE_TTL_SECONDS: int = 86400
+
+    # Auth Throttling (sliding window, per worker; login limits count failed attempts only)
+    LOGIN_WINDOW_SECONDS: int = 300
+    LOGIN_MAX_FAILURES_PER_IP_EMAIL: int = 5   # Strict: one client guessing one account
+    LOGIN_MAX_FAILURES_PER_IP: int = 30
+    LOGIN_MAX_FAILURES_PER_EMAIL: int = 50     # Loose: anyone can target an email
+    REFRESH_MAX_PER_IP: int = 60
+    CLIENT_IP_HEADER: str = ""   # Set only if a trusted proxy overwrites it, e.g. "x-real-ip"
+
+    # Model Routing (tiers: "small" | "large")
+    GROQ_SMALL_MODEL: str = "llama-3.1-8b-instant"
+    GROQ_LARGE_MODEL: str = "llama-3.3-70b-versatile"
+    MODEL_TIER_PARSE: str = "small"
+    MODEL_TIER_PRESCREEN: str = "small"
+    MODEL_TIER_MATCH: str = "large"
+    MODEL_TIER_GENERATE: str = "large"
+    MATCH_FINAL_MIN_SCORE: int = 60  # Pre-screen score needed for a large-model final pass
+    MATCH_CONCURRENCY: int = 8       # Candidates scored in parallel per match request
+
+    # Background Pre-scoring
+    PRESCORE_ENABLED: bool = True
+    PRESCORE_MAX_CANDIDATES: int = 500  # Most recent resumes scored when a job is created/updated
+    PRESCORE_MAX_JOBS: int = 20         # Most recent jobs a new resume is scored against
+
+    # Lifecycle Cleanup
+    GC_CHUNK_SIZE: int = 200
+    GC_CHUNK_PAUSE_SECONDS: float = 0.2  # Throttle between cleanup batches to protect live traffic
+
+    # Resume Parsing
+    RESUME_PARSE_OFFLINE: bool = False   # Skip the LLM entirely, use local extraction only
+    RESUME_PROMPT_MAX_CHARS: int = 6000  # Budget for the section-aware parse prompt
+    CANDIDATE_PROFILE_MAX_TOKENS: int = 400  # Cap on the compact profile sent with every match
+
+    # Admin Provisioning
+    PROVISION_CONCURRENCY: int = 10  # Parallel Supabase Auth create_user calls
+
+    # Write-Behind Buffering
+    WRITE_BUFFER_MAX_ROWS: int = 100
+    WRITE_BUFFER_MAX_DELAY_SECONDS: float = 1.0
+    WRITE_BUFFER_MAX_RETRIES: int = 4
+    WRITE_JOURNAL_DIR: str = "/tmp/prashne-journal"  # /tmp is the only writable path on Vercel
+
     class Config:
         env_file = "../../.env"
         # Adjust path if running from server/prashne/main.py or similar
@@ -1,4 +1,4 @@
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
 from prashne.core.config import settings
 
 # Standard Client (Anon Key) - For public/RLS protected access
@@ -6,3 +6,15 @@ supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
 
 # Admin Client (Service Role Key) - For bypassing RLS and User Management
 supabase_admin: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
+
+def create_auth_client() -> Client:
+    """
+    Fresh anon client for a single sign-in or token refresh. Signing in on the shared
+    client would store that user's session on it (and its background refresh timer);
+    concurrent requests would then race over, and act as, one another's session.
+    """
+    return create_client(
+        settings.SUPABASE_URL,
+        settings.SUPABASE_KEY,
+        options=ClientOptions(auto_refresh_token=False, persist_session=False)
+    )
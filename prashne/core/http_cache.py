@@ -0,0 +1,161 @@
+import gzip
+import json
+import hashlib
+import secrets
+from typing import Dict, Any, List, Optional
+from fastapi import Request, Response
+from prashne.core.cache import cache
+from prashne.core.write_buffer import resume_writer, match_writer
+
+try:
+    import orjson
+except ImportError:  # Falls back to the stdlib encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Responses smaller than this aren't worth compressing
+MIN_COMPRESS_BYTES = 1024
+
+# Versions live in the cache; they can only stand in for the data when every worker
+# sees the same counters. A per-process backend only sees its own worker's writes,
+# so conditional GETs then fall back to hashing the response body.
+_versions = cache.namespace("data_versions")
+
+# ---------------------------------------------------------------------------
+# Per-tenant data versions
+# ---------------------------------------------------------------------------
+
+def tenant_key(current_user: Dict[str, Any]) -> str:
+    company_id = current_user.get("company_id")
+    return f"company:{company_id}" if company_id else f"user:{current_user.get('sub')}"
+
+def _row_tenant_key(row: Dict[str, Any]) -> str:
+    company_id = row.get("company_id")
+    return f"company:{company_id}" if company_id else f"user:{row.get('created_by')}"
+
+def bump_version(key: str):
+    try:
+        _versions.incr(key)
+    except Exception as e:
+        print(f"Data Version Bump Error ({key}): {e}")
+
+def bump_tenant(current_user: Dict[str, Any]):
+    """
+    Marks the caller's tenant data as changed; call after every write.
+    """
+    bump_version(tenant_key(current_user))
+
+def data_version(key: str) -> int:
+    try:
+        # Create the counter on first read: a missing counter reading as 0 would let an
+        # ETag issued before an invalidation match again afterwards
+        return _versions.counter(key) or _versions.incr(key)
+    except Exception as e:
+        # Unknown version: never let a stale ETag match
+        print(f"Data Version Read Error ({key}): {e}")
+        return -secrets.randbelow(1 << 30) - 1
+
+def _bump_for_rows(rows: List[Dict[str, Any]]):
+    for key in {_row_tenant_key(r) for r in rows}:
+        bump_version(key)
+
+# Batched writes only change what clients see once they land in Supabase
+resume_writer.add_listener(_bump_for_rows)
+match_writer.add_listener(_bump_for_rows)
+
+# ---------------------------------------------------------------------------
+# Conditional GET
+# ---------------------------------------------------------------------------
+
+def compute_etag(request: Request, current_user: Dict[str, Any]) -> Optional[str]:
+    """
+    ETag derived from the tenant's data version, the caller and the URL.
+    Computing it needs no database access. Returns None unless the cache backend is
+    shared; json_response then derives the ETag from the body instead.
+    """
+    if not cache.shared:
+        return None
+    key = tenant_key(current_user)
+    raw = f"{key}|{data_version(key)}|{current_user.get('sub')}|{request.url.path}?{request.url.query}"
+    return f'W/"{hashlib.sha1(raw.encode()).hexdigest()[:20]}"'
+
+def content_etag(body: bytes) -> str:
+    return f'W/"c{hashlib.sha1(body).hexdigest()[:20]}"'
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in header.split(","))
+
+def not_modified(request: Request, etag: Optional[str]) -> Optional[Response]:
+    """
+    Returns a 304 response if the client already holds this version, else None.
+    """
+    if etag and _etag_matches(request, etag):
+        return Response(status_code=304, headers=_cache_headers(etag))
+    return None
+
+# ---------------------------------------------------------------------------
+# Serialization + compression
+# ---------------------------------------------------------------------------
+
+def _cache_headers(etag: str) -> Dict[str, str]:
+    return {
+        "ETag": etag,
+        # Clients may keep the body but must revalidate before reusing it
+        "Cache-Control": "private, no-cache",
+        "Vary": "Accept-Encoding, Authorization",
+    }
+
+def dumps(data: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":"), default=str).encode()
+
+def _accepted_encodings(request: Request) -> Dict[str, float]:
+    accepted = {}
+    for part in request.headers.get("accept-encoding", "").split(","):
+        token, _, params = part.strip().partition(";")
+        if not token:
+            continue
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token.lower()] = q
+    return accepted
+
+def json_response(request: Request, data: Any, etag: Optional[str] = None) -> Response:
+    """
+    Serializes `data` with the fast encoder and compresses it (br > gzip) if the client accepts it.
+    Without a version ETag the body hash is used, so unchanged data still answers 304
+    (after the read, but without re-sending the body).
+    """
+    body = dumps(data)
+    if etag is None:
+        etag = content_etag(body)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+    headers = _cache_headers(etag)
+
+    if len(body) >= MIN_COMPRESS_BYTES:
+        accepted = _accepted_encodings(request)
+        if brotli is not None and accepted.get("br", 0) > 0:
+            body = brotli.compress(body, quality=4)
+            headers["Content-Encoding"] = "br"
+        elif accepted.get("gzip", 0) > 0:
+            body = gzip.compress(body, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,29 @@
+from typing import Dict, Any, Optional
+from prashne.core.config import settings
+from prashne.core.database import supabase_admin
+from prashne.core.cache import cache
+
+_profiles = cache.namespace("profiles")
+
+def get_profile(user_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Returns the user's profile (id, email, full_name, role, company_id).
+    Cached for PROFILE_CACHE_TTL_SECONDS so tenant scoping doesn't cost a query per request.
+    """
+    profile = _profiles.get(user_id)
+    if profile is not None:
+        return profile
+
+    res = supabase_admin.table("profiles")\
+        .select("id, email, full_name, role, company_id")\
+        .eq("id", user_id)\
+        .limit(1)\
+        .execute()
+    profile = res.data[0] if res.data else None
+
+    if profile:
+        _profiles.set(user_id, profile, settings.PROFILE_CACHE_TTL_SECONDS)
+    return profile
+
+def invalidate_profile(user_id: str):
+    _profiles.delete(user_id)
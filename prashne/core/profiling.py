@@ -0,0 +1,263 @@
+import os
+import sys
+import time
+import random
+import asyncio
+import itertools
+import threading
+from collections import Counter, deque
+from typing import Dict, Any, List, Optional
+
+class ProfilerState:
+    """
+    Runtime-toggled profiling config. Everything is off until a super admin enables it.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.route_prefix: Optional[str] = None   # e.g. "/api/jobs/match"; None = every route
+        self.sample_rate = 1.0                     # Fraction of matching requests to profile
+        self.slow_ms = 0.0                         # Only keep profiles at least this slow
+        self.interval_ms = 10.0                    # Stack sampling period
+        self.profiles: deque = deque(maxlen=50)    # Ring buffer of recent captures
+        # Captures are appended on the event loop but read from threadpool routes
+        self._profiles_lock = threading.Lock()
+
+    def configure(self, enabled: bool, route_prefix: Optional[str], sample_rate: float,
+                  slow_ms: float, interval_ms: float, max_profiles: int):
+        self.route_prefix = route_prefix or None
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.interval_ms = interval_ms
+        with self._profiles_lock:
+            if max_profiles != self.profiles.maxlen:
+                self.profiles = deque(self.profiles, maxlen=max_profiles)
+        self.enabled = enabled
+
+    def record(self, profile: Dict[str, Any]):
+        with self._profiles_lock:
+            self.profiles.append(profile)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._profiles_lock:
+            return list(self.profiles)
+
+    def clear(self):
+        with self._profiles_lock:
+            self.profiles.clear()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "route_prefix": self.route_prefix,
+            "sample_rate": self.sample_rate,
+            "slow_ms": self.slow_ms,
+            "interval_ms": self.interval_ms,
+            "max_profiles": self.profiles.maxlen,
+        }
+
+state = ProfilerState()
+_ids = itertools.count(1)
+
+# ---------------------------------------------------------------------------
+# Stack sampler
+# ---------------------------------------------------------------------------
+
+def _fold_stack(frame, thread_name: str) -> str:
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        name = getattr(code, "co_qualname", code.co_name)
+        parts.append(f"{name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    parts.append(thread_name)
+    return ";".join(reversed(parts))
+
+# Leaf frames of threads parked in the stdlib (pool workers waiting for work, the
+# event loop waiting on its selector, ...). Sampling them would bury the request's
+# own stacks under idle time.
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES
+
+class _Sampler:
+    """
+    One thread samples every thread's stack while at least one request is being profiled.
+    Samples are shared by all concurrently profiled requests (stacks are process-wide);
+    threads parked in a known wait are skipped.
+    """
+
+    def __init__(self):
+        self._active: Dict[int, Counter] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, key: int) -> Counter:
+        counts: Counter = Counter()
+        with self._lock:
+            self._active[key] = counts
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+                self._thread.start()
+        return counts
+
+    def stop(self, key: int):
+        with self._lock:
+            self._active.pop(key, None)
+
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            with self._lock:
+                if not self._active:
+                    # Cleared under the lock so start() never sees a thread that is about to exit
+                    self._thread = None
+                    return
+            names = {t.ident: t.name for t in threading.enumerate()}
+            stacks = [
+                _fold_stack(frame, names.get(ident, f"thread-{ident}"))
+                for ident, frame in sys._current_frames().items()
+                if ident != me and not _is_idle(frame)
+            ]
+            # Counted under the lock so a stopped request's counts are final
+            with self._lock:
+                for counts in self._active.values():
+                    counts.update(stacks)
+            time.sleep(state.interval_ms / 1000)
+
+_sampler = _Sampler()
+
+# ---------------------------------------------------------------------------
+# Event loop lag
+# ---------------------------------------------------------------------------
+
+class _LoopLagMonitor:
+    PERIOD = 0.25
+
+    def __init__(self):
+        self.last_ms = 0.0
+        self.max_ms = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def ensure_running(self):
+        if self._task is None or self._task.done():
+            self.max_ms = 0.0
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while state.enabled:
+            expected = loop.time() + self.PERIOD
+            await asyncio.sleep(self.PERIOD)
+            self.last_ms = max(0.0, (loop.time() - expected) * 1000)
+            self.max_ms = max(self.max_ms, self.last_ms)
+
+loop_lag = _LoopLagMonitor()
+
+def executor_stats() -> Dict[str, Any]:
+    """
+    Queue depth of the pools blocking work runs on. Must be called on the event loop.
+    """
+    stats: Dict[str, Any] = {}
+    try:
+        # Sync routes and run_in_threadpool go through anyio's limiter
+        import anyio.to_thread
+        limiter = anyio.to_thread.current_default_thread_limiter().statistics()
+        stats["threadpool"] = {
+            "busy": limiter.borrowed_tokens,
+            "capacity": limiter.total_tokens,
+            "waiting": limiter.tasks_waiting,
+        }
+    except Exception as e:
+        stats["threadpool"] = {"error": str(e)}
+
+    # loop.run_in_executor(None, ...) (Groq calls, write-behind flushes)
+    executor = getattr(asyncio.get_running_loop(), "_default_executor", None)
+    if executor is not None:
+        stats["default_executor"] = {
+            "threads": len(getattr(executor, "_threads", ())),
+            "max_workers": getattr(executor, "_max_workers", None),
+            "queued": executor._work_queue.qsize() if hasattr(executor, "_work_queue") else None,
+        }
+    return stats
+
+def runtime_stats() -> Dict[str, Any]:
+    return {
+        "event_loop_lag_ms": {"last": round(loop_lag.last_ms, 2), "max": round(loop_lag.max_ms, 2)},
+        "executors": executor_stats(),
+    }
+
+# ---------------------------------------------------------------------------
+# ASGI middleware
+# ---------------------------------------------------------------------------
+
+class ProfilingMiddleware:
+    """
+    Profiles selected requests. When profiling is off this is a single attribute check.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not state.enabled or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        path = scope.get("path", "")
+        if state.route_prefix and not path.startswith(state.route_prefix):
+            return await self.app(scope, receive, send)
+        if state.sample_rate < 1.0 and random.random() >= state.sample_rate:
+            return await self.app(scope, receive, send)
+
+        loop_lag.ensure_running()
+        profile_id = next(_ids)
+        status_code = {"value": None}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_code["value"] = message["status"]
+            await send(message)
+
+        started_wall = time.time()
+        started = time.perf_counter()
+        counts = _sampler.start(profile_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _sampler.stop(profile_id)
+            duration_ms = (time.perf_counter() - started) * 1000
+            if duration_ms >= state.slow_ms:
+                state.record({
+                    "id": profile_id,
+                    "method": scope.get("method"),
+                    "path": path,
+                    "status": status_code["value"],
+                    "started_at": started_wall,
+                    "duration_ms": round(duration_ms, 1),
+                    "samples": sum(counts.values()),
+                    "folded": counts,
+                    "runtime": runtime_stats(),
+                })
+
+def list_profiles() -> List[Dict[str, Any]]:
+    return [{k: v for k, v in p.items() if k != "folded"} for p in reversed(state.snapshot())]
+
+def get_folded(profile_id: int) -> Optional[str]:
+    """
+    Collapsed-stack text ("frame;frame;frame count" per line), readable by
+    flamegraph.pl, speedscope and inferno.
+    """
+    for p in state.snapshot():
+        if p["id"] == profile_id:
+            return "\n".join(f"{stack} {count}" for stack, count in p["folded"].most_common())
+    return None
+
+def clear_profiles():
+    state.clear()
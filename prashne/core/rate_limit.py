@@ -0,0 +1,81 @@
+import time
+import threading
+from collections import deque
+from typing import Dict, Optional
+from fastapi import HTTPException, Request, status
+from prashne.core.config import settings
+
+class SlidingWindowLimiter:
+    """
+    In-memory sliding-window limiter: at most `limit` hits per key in any `window` seconds.
+    Checking and recording are separate so callers can count only failures.
+    Per worker by design; it only has to absorb bursts, not enforce global quotas.
+    """
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self._hits: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self._calls = 0
+
+    def _live(self, key: str, now: float) -> Optional[deque]:
+        hits = self._hits.get(key)
+        if hits is not None:
+            while hits and hits[0] <= now - self.window:
+                hits.popleft()
+        return hits
+
+    def retry_after(self, key: str) -> Optional[float]:
+        """
+        None while `key` is under the limit, else the seconds until the next slot frees up.
+        """
+        now = time.monotonic()
+        with self._lock:
+            hits = self._live(key, now)
+            if hits is None or len(hits) < self.limit:
+                return None
+            return max(0.0, hits[0] + self.window - now)
+
+    def hit(self, key: str):
+        now = time.monotonic()
+        with self._lock:
+            self._calls += 1
+            if self._calls % 1000 == 0:
+                self._sweep(now - self.window)
+            hits = self._live(key, now)
+            if hits is None:
+                hits = self._hits[key] = deque()
+            hits.append(now)
+
+    def reset(self, key: str):
+        with self._lock:
+            self._hits.pop(key, None)
+
+    def _sweep(self, cutoff: float):
+        # Drop keys whose hits have all expired so memory tracks active clients only
+        for key in [k for k, hits in self._hits.items() if not hits or hits[-1] <= cutoff]:
+            del self._hits[key]
+
+def client_ip(request: Request) -> str:
+    """
+    The socket peer, or CLIENT_IP_HEADER when a trusted proxy sets it. Headers like
+    X-Forwarded-For are client-controlled unless the proxy overwrites them, so they
+    are never read by default.
+    """
+    header = settings.CLIENT_IP_HEADER
+    if header:
+        value = request.headers.get(header)
+        if value:
+            # X-Forwarded-For style lists: the proxy-facing client comes first
+            return value.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+def enforce(limiter: SlidingWindowLimiter, key: str):
+    retry_after = limiter.retry_after(key)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many attempts. Please try again later.",
+            headers={"Retry-After": str(int(retry_after) + 1)},
+        )
@@ -1,16 +1,34 @@
+import time
 from typing import Dict, Any
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import jwt
 from prashne.core.config import settings
+from prashne.core.cache import cache, hash_key
 
 security = HTTPBearer()
 
+# Verified token payloads, keyed by token hash; entries never outlive the token's exp
+_verified_tokens = cache.namespace("jwt")
+
+def _cache_payload(token_key: str, payload: Dict[str, Any]):
+    ttl = settings.JWT_CACHE_TTL_SECONDS
+    if payload.get("exp"):
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        _verified_tokens.set(token_key, payload, ttl)
+
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict[str, Any]:
     """
     Validates the Bearer token and returns the decoded payload.
     """
     token = credentials.credentials
+    token_key = hash_key(token)
+
+    cached = _verified_tokens.get(token_key)
+    if cached is not None:
+        # Copy: callers annotate the payload (e.g. role, company_id)
+        return dict(cached)
     
     try:
         # ------------------------------------------------------------------
@@ -27,6 +45,7 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
                 audience="authenticated",  # <--- CRITICAL FIX: Matches Supabase 'aud'
                 leeway=60                  # <--- CRITICAL FIX: Prevents 'iat' errors
             )
+            _cache_payload(token_key, payload)
             return payload
 
         except jwt.InvalidSignatureError:
@@ -41,6 +60,7 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
                 audience="authenticated", # <--- CRITICAL FIX
                 leeway=60                 # <--- CRITICAL FIX
             )
+            _cache_payload(token_key, payload)
             return payload
 
     except jwt.ExpiredSignatureError:
@@ -0,0 +1,371 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Callable, Tuple
+from prashne.core.config import settings
+from prashne.core.database import supabase_admin
+
+try:
+    import fcntl
+except ImportError:  # Non-POSIX dev machines: single worker, no cross-process locking needed
+    fcntl = None
+
+# SQLSTATE classes that will fail the same way on every retry:
+# 22 data exception, 23 integrity constraint (FK, unique, not null), 42 syntax/undefined column
+PERMANENT_SQLSTATE_CLASSES = ("22", "23", "42")
+
+def is_permanent_error(exc: Exception) -> bool:
+    """
+    True for PostgREST/Postgres errors caused by the rows themselves rather than by
+    Supabase being unreachable. Network errors carry no code and count as transient.
+    """
+    code = str(getattr(exc, "code", None) or "")
+    if code.startswith("PGRST"):
+        # PGRST0xx are connection/pool errors; the rest reject the request itself
+        return not code.startswith("PGRST0")
+    return code[:2] in PERMANENT_SQLSTATE_CLASSES
+
+class PermanentWriteError(Exception):
+    pass
+
+class FlushResult:
+    """
+    Outcome of a synchronous write. `ok` is False if rows had to be journaled;
+    `rejected` lists (row, error) for rows Postgres refused (moved to the dead-letter file).
+    """
+
+    def __init__(self, ok: bool = True, rejected: Optional[List[Tuple[Dict[str, Any], str]]] = None):
+        self.ok = ok
+        self.rejected = rejected or []
+
+class WriteBehindBuffer:
+    """
+    Groups rows for one table into multi-row inserts/upserts.
+
+    Rows are flushed by a background thread once `max_rows` are pending or the
+    oldest row has waited `max_delay` seconds. Failed writes are retried with
+    exponential backoff and, if Supabase stays unavailable, appended to a local
+    JSONL journal that is replayed before the next write, so journaled rows never
+    overwrite newer ones for the same conflict key.
+    Rows Postgres rejects (constraint violations, bad data) are not retried: the
+    failing chunk is bisected down to the offending rows, which go to a
+    dead-letter file so the rest of the chunk still lands.
+    """
+
+    def __init__(self, table: str, on_conflict: Optional[str] = None):
+        self.table = table
+        self.on_conflict = on_conflict
+        self.max_rows = settings.WRITE_BUFFER_MAX_ROWS
+        self.max_delay = settings.WRITE_BUFFER_MAX_DELAY_SECONDS
+        self.max_retries = settings.WRITE_BUFFER_MAX_RETRIES
+        self.journal_path = os.path.join(settings.WRITE_JOURNAL_DIR, f"{table}.jsonl")
+        self.dead_letter_path = os.path.join(settings.WRITE_JOURNAL_DIR, f"{table}.dead.jsonl")
+
+        self._pending: List[Dict[str, Any]] = []
+        self._oldest: Optional[float] = None
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[List[Dict[str, Any]]], None]] = []
+        self._blocked: Dict[str, Dict[Any, float]] = {}   # column -> {value: expires}
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+
+    def add(self, row: Dict[str, Any]):
+        self.add_many([row])
+
+    def add_many(self, rows: List[Dict[str, Any]]):
+        with self._cond:
+            if self._blocked:
+                rows = [r for r in rows if not self._is_blocked(r)]
+            if not rows:
+                return
+            was_empty = not self._pending
+            if was_empty:
+                self._oldest = time.monotonic()
+            self._pending.extend(rows)
+            self._ensure_worker()
+            # Wake the worker to start the time window, or to flush a full batch
+            if was_empty or len(self._pending) >= self.max_rows:
+                self._cond.notify()
+
+    def flush(self) -> FlushResult:
+        """
+        Synchronously writes everything pending.
+        """
+        with self._cond:
+            rows, self._pending, self._oldest = self._pending, [], None
+        return self._write(rows)
+
+    def write(self, rows: List[Dict[str, Any]]) -> FlushResult:
+        """
+        Synchronously writes `rows` (bypassing the pending batch), for callers that
+        must report per-row outcomes, e.g. which uploaded resumes were rejected.
+        """
+        return self._write(list(rows))
+
+    def discard(self, predicate: Callable[[Dict[str, Any]], bool]) -> int:
+        """
+        Drops pending (not yet written) rows matching `predicate`, e.g. for deleted entities.
+        """
+        with self._cond:
+            kept = [r for r in self._pending if not predicate(r)]
+            dropped = len(self._pending) - len(kept)
+            self._pending = kept
+            if not kept:
+                self._oldest = None
+        return dropped
+
+    def block(self, column: str, values: List[Any], ttl: float = 3600) -> int:
+        """
+        Drops pending rows whose `column` is in `values` and rejects new ones for `ttl`
+        seconds, so in-flight matching can't write rows for entities being deleted.
+        Returns the number of pending rows dropped.
+        """
+        now = time.monotonic()
+        with self._cond:
+            for entries in self._blocked.values():
+                for value in [v for v, exp in entries.items() if exp <= now]:
+                    del entries[value]
+            self._blocked.setdefault(column, {}).update({v: now + ttl for v in values})
+        return self.discard(self._is_blocked)
+
+    def _is_blocked(self, row: Dict[str, Any]) -> bool:
+        now = time.monotonic()
+        for column, blocked in list(self._blocked.items()):
+            expires = blocked.get(row.get(column))
+            if expires is not None:
+                if expires > now:
+                    return True
+                del blocked[row.get(column)]
+        return False
+
+    def add_listener(self, listener: Callable[[List[Dict[str, Any]]], None]):
+        """
+        Registers a callback invoked with each batch after it is durably written to Supabase.
+        """
+        self._listeners.append(listener)
+
+    # ------------------------------------------------------------------
+    # Worker side
+    # ------------------------------------------------------------------
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=f"write-behind-{self.table}", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if len(self._pending) >= self.max_rows:
+                        break
+                    if self._pending:
+                        wait = self.max_delay - (time.monotonic() - self._oldest)
+                        if wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+                rows, self._pending, self._oldest = self._pending, [], None
+            self._write(rows)
+
+    def _dedupe(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Postgres rejects an upsert that touches the same conflict key twice
+        if not self.on_conflict:
+            return rows
+        keys = [k.strip() for k in self.on_conflict.split(",")]
+        latest = {}
+        for row in rows:
+            latest[tuple(row.get(k) for k in keys)] = row
+        return list(latest.values())
+
+    def _execute(self, rows: List[Dict[str, Any]]):
+        table = supabase_admin.table(self.table)
+        if self.on_conflict:
+            table.upsert(rows, on_conflict=self.on_conflict).execute()
+        else:
+            table.insert(rows).execute()
+
+    def _notify(self, rows: List[Dict[str, Any]]):
+        for listener in self._listeners:
+            try:
+                listener(rows)
+            except Exception as e:
+                print(f"Write-Behind Listener Error ({self.table}): {e}")
+
+    def _write_with_retry(self, rows: List[Dict[str, Any]]) -> bool:
+        """
+        Returns False if Supabase stayed unavailable; raises PermanentWriteError
+        without retrying if the rows themselves were rejected.
+        """
+        delay = 0.5
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._execute(rows)
+            except Exception as e:
+                if is_permanent_error(e):
+                    raise PermanentWriteError(str(e)) from e
+                print(f"Write-Behind Error ({self.table}, attempt {attempt + 1}): {e}")
+                if attempt < self.max_retries:
+                    time.sleep(delay)
+                    delay *= 2
+                continue
+            self._notify(rows)
+            return True
+        return False
+
+    def _write_rows(self, rows: List[Dict[str, Any]],
+                    rejected: List[Tuple[Dict[str, Any], str]]) -> List[Dict[str, Any]]:
+        """
+        Writes one chunk, isolating rejected rows by bisection (appended to `rejected`).
+        Returns the rows that could not be written because Supabase was unavailable.
+        """
+        try:
+            return [] if self._write_with_retry(rows) else rows
+        except PermanentWriteError as e:
+            if len(rows) == 1:
+                self._dead_letter(rows[0], e)
+                rejected.append((rows[0], str(e)))
+                return []
+            mid = len(rows) // 2
+            failed = self._write_rows(rows[:mid], rejected)
+            if failed:
+                # Supabase went away mid-bisection; don't wait out the retries twice
+                return failed + rows[mid:]
+            return self._write_rows(rows[mid:], rejected)
+
+    def _write(self, rows: List[Dict[str, Any]]) -> FlushResult:
+        if self._blocked:
+            # Rows taken by the worker just before a block() landed
+            with self._cond:
+                rows = [r for r in rows if not self._is_blocked(r)]
+        if not rows:
+            return FlushResult()
+        rows = self._dedupe(rows)
+        result = FlushResult()
+        with self._flush_lock:
+            # Older journaled rows first; if Supabase is still down, queue behind them
+            if not self._replay_journal():
+                self._spill(rows)
+                result.ok = False
+                return result
+            for i in range(0, len(rows), self.max_rows):
+                failed = self._write_rows(rows[i:i + self.max_rows], result.rejected)
+                if failed:
+                    self._spill(failed)
+                    result.ok = False
+        return result
+
+    # ------------------------------------------------------------------
+    # Durable journal
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _file_lock(self, suffix: str, blocking: bool = True):
+        """
+        Cross-process lock on `<journal>.<suffix>`; every worker on the host shares the journal.
+        Yields False if `blocking` is off and another process holds the lock.
+        """
+        if fcntl is None:
+            yield True
+            return
+        os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+        with open(f"{self.journal_path}.{suffix}", "a") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _append(self, path: str, lines: List[str]):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            for line in lines:
+                f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _spill(self, rows: List[Dict[str, Any]]):
+        try:
+            # Held so a concurrent replay never renames the journal mid-append
+            with self._file_lock("lock"):
+                self._append(self.journal_path, [json.dumps(row, default=str) for row in rows])
+            print(f"Write-Behind: spilled {len(rows)} {self.table} rows to {self.journal_path}")
+        except Exception as e:
+            print(f"Write-Behind Journal Error ({self.table}): {e}. {len(rows)} rows lost.")
+
+    def _dead_letter(self, row: Dict[str, Any], error: Exception):
+        print(f"Write-Behind: rejected {self.table} row moved to {self.dead_letter_path}: {error}")
+        try:
+            with self._file_lock("lock"):
+                self._append(self.dead_letter_path, [
+                    json.dumps({"failed_at": time.time(), "error": str(error), "row": row}, default=str)
+                ])
+        except Exception as e:
+            print(f"Write-Behind Dead-Letter Error ({self.table}): {e}. Row lost.")
+
+    def _replay_journal(self) -> bool:
+        """
+        Writes journaled rows back to Supabase. Returns False only if Supabase was
+        still unavailable (the rows are journaled again).
+        """
+        replay_path = self.journal_path + ".replay"
+        if not os.path.exists(self.journal_path) and not os.path.exists(replay_path):
+            return True
+        # One replayer per host; others skip rather than wait on its network writes
+        with self._file_lock("replay-lock", blocking=False) as acquired:
+            if not acquired:
+                return True
+            try:
+                with self._file_lock("lock"):
+                    # A leftover .replay file means a previous replay was interrupted; finish it first
+                    if not os.path.exists(replay_path):
+                        if not os.path.exists(self.journal_path):
+                            return True
+                        os.replace(self.journal_path, replay_path)
+                with open(replay_path, encoding="utf-8") as f:
+                    rows = [json.loads(line) for line in f if line.strip()]
+            except Exception as e:
+                print(f"Write-Behind Replay Error ({self.table}): {e}")
+                return True
+
+            if self._blocked:
+                # Entities deleted while their rows sat in the journal
+                with self._cond:
+                    rows = [r for r in rows if not self._is_blocked(r)]
+            rows = self._dedupe(rows)
+            replayed = 0
+            ok = True
+            for i in range(0, len(rows), self.max_rows):
+                chunk = rows[i:i + self.max_rows]
+                # Rejections here belong to earlier requests; the dead-letter file has them
+                failed = self._write_rows(chunk, [])
+                if failed:
+                    self._spill(failed + rows[i + self.max_rows:])
+                    ok = False
+                    break
+                replayed += len(chunk)
+            try:
+                os.remove(replay_path)
+            except FileNotFoundError:
+                pass
+            print(f"Write-Behind: replayed {replayed}/{len(rows)} journaled {self.table} rows")
+            return ok
+
+# Resume ids are generated client-side, so upserting on id keeps retries and replays idempotent
+resume_writer = WriteBehindBuffer("resumes", on_conflict="id")
+match_writer = WriteBehindBuffer("matches", on_conflict="job_id,resume_id")
+
+def flush_all():
+    for buffer in (resume_writer, match_writer):
+        buffer.flush()
@@ -1,6 +1,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from prashne.api.router import api_router
+from prashne.core.write_buffer import flush_all
+from prashne.core.profiling import ProfilingMiddleware
 
 app = FastAPI(title="Prashne API")
 
@@ -14,9 +16,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in sampling profiler (toggled at /api/admin/profiling; a no-op while disabled)
+app.add_middleware(ProfilingMiddleware)
+
 # Include API Router
 app.include_router(api_router, prefix="/api")
 
+@app.on_event("shutdown")
+def flush_write_buffers():
+    # Drain pending batched writes before the worker exits
+    flush_all()
+
 @app.get("/")
 def root():
     return {"status": "Prashne Backend Online"}
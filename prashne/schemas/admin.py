@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import Optional, List
 from enum import Enum
 
 class PlanTier(str, Enum):
@@ -18,3 +18,27 @@ class UserProvision(BaseModel):
     company_id: str
     role: str = "hr_admin"
     password: str = Field(..., min_length=8)
+
+class BulkUserRow(BaseModel):
+    email: EmailStr
+    full_name: str
+    company_id: Optional[str] = None  # Falls back to BulkUserProvision.company_id
+    role: str = "hr_user"
+    password: Optional[str] = Field(None, min_length=8)  # Generated if omitted
+
+class BulkUserProvision(BaseModel):
+    company_id: Optional[str] = None
+    reset_passwords: bool = False  # Issue new passwords to repaired (pre-existing) auth users
+    users: List[BulkUserRow] = Field(..., min_length=1, max_length=1000)
+
+class ProfilingConfig(BaseModel):
+    enabled: bool
+    route_prefix: Optional[str] = None  # e.g. "/api/jobs/match"
+    sample_rate: float = Field(1.0, ge=0.0, le=1.0)
+    slow_ms: float = Field(0.0, ge=0.0)  # Keep only captures at least this slow
+    interval_ms: float = Field(10.0, ge=1.0, le=1000.0)
+    max_profiles: int = Field(50, ge=1, le=500)
+
+class UnscopedJobAssignment(BaseModel):
+    company_id: str
+    job_ids: Optional[List[str]] = Field(None, max_length=1000)  # None = every unscoped job
@@ -0,0 +1,5 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+class BulkDeleteRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=1000)
@@ -1,20 +1,38 @@
-import json
 import asyncio
-from typing import Dict, Any, List
-from groq import Groq
+from typing import Dict, Any, List, Optional, Callable, AsyncIterator
 from prashne.core.config import settings
+from prashne.core.cache import cache, hash_key
+from prashne.services.model_router import complete_json, model_for
+from prashne.services.candidate_profile import build_candidate_profile
 
-client = Groq(api_key=settings.GROQ_API_KEY)
-MODEL_NAME = "llama-3.3-70b-versatile"
+# Match outcomes keyed by (profile, JD, task tier model); re-running the same JD is free
+_match_cache = cache.namespace("match")
 
-async def match_resume_to_jd(resume_json: Dict[str, Any], jd_text: str) -> Dict[str, Any]:
+def _valid_match_output(data: Dict[str, Any]) -> bool:
     """
-    Compare a single resume (JSON) against a JD (text) using AI.
+    Schema + confidence check: a usable score, a non-empty reason and a skills list.
+    """
+    score = data.get("score")
+    if isinstance(score, bool) or not isinstance(score, (int, float)) or not 0 <= score <= 100:
+        return False
+    reason = data.get("reason")
+    if not isinstance(reason, str) or not reason.strip():
+        return False
+    return isinstance(data.get("missing_skills", []), list)
+
+async def match_resume_to_jd(profile_text: str, jd_text: str, task: str = "match") -> Dict[str, Any]:
+    """
+    Compare a single candidate (compact profile text) against a JD (text) using AI.
+    `task` selects the model tier ("prescreen" for the fast pass, "match" for final reasons).
     """
-    # Defensive programming: ensure resume_json is not overly huge
-    resume_str = json.dumps(resume_json, default=str)[:8000] # Truncate to avoid context limit
     jd_snippet = jd_text[:5000]
 
+    # Keyed on the concrete model so a model swap doesn't serve the old model's scores
+    cache_key = hash_key(task, model_for(task), profile_text, jd_snippet)
+    cached = _match_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     system_prompt = """
     You are an expert Technical Recruiter. Compare the Candidate Profile against the Job Description.
     
@@ -32,31 +50,30 @@ async def match_resume_to_jd(resume_json: Dict[str, Any], jd_text: str) -> Dict[
     {jd_snippet}
 
     Candidate Profile:
-    {resume_str}
+    {profile_text}
     """
 
     try:
         # Run synchronous Groq call in a thread pool to avoid blocking the event loop
         loop = asyncio.get_event_loop()
-        completion = await loop.run_in_executor(None, lambda: client.chat.completions.create(
-            model=MODEL_NAME,
-            messages=[
+        data = await loop.run_in_executor(None, lambda: complete_json(
+            task,
+            [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_message}
             ],
             temperature=0.1,
-            response_format={"type": "json_object"}
+            validate=_valid_match_output
         ))
 
-        content = completion.choices[0].message.content
-        data = json.loads(content)
-        
         # Ensure strict typing returns
-        return {
-            "score": data.get("score", 0),
+        result = {
+            "score": int(data.get("score", 0)),
             "reason": data.get("reason", "Analysis failed"),
             "missing_skills": data.get("missing_skills", [])
         }
+        _match_cache.set(cache_key, result, settings.MATCH_CACHE_TTL_SECONDS)
+        return result
     except Exception as e:
         print(f"Match Error: {e}")
         return {
@@ -65,37 +82,96 @@ async def match_resume_to_jd(resume_json: Dict[str, Any], jd_text: str) -> Dict[
             "missing_skills": []
         }
 
-async def batch_match_resumes(resumes: List[Dict[str, Any]], jd_text: str) -> List[Dict[str, Any]]:
+def _profile_text(resume: Dict[str, Any]) -> str:
+    # Rows come from CANDIDATE_COLUMNS + hydrate_candidate_profiles, so the
+    # compact, pre-rendered profile is always present
+    profile = resume.get("candidate_profile") or {}
+    if profile.get("text"):
+        return profile["text"]
+    return build_candidate_profile(resume.get("raw_ai_response") or {}, resume.get("candidate_name"), resume.get("experience_years"))["text"]
+
+async def score_candidate(resume: Dict[str, Any], jd_text: str, cancel: Optional[asyncio.Event] = None) -> Dict[str, Any]:
+    """
+    Scores one resume row against a JD.
+    The candidate is pre-screened on the fast tier; if it scores at least
+    MATCH_FINAL_MIN_SCORE it is re-scored on the match tier for the final reason.
+    The final pass is skipped once `cancel` is set.
+    """
+    profile = _profile_text(resume)
+    match_data = await match_resume_to_jd(profile, jd_text, task="prescreen")
+    if cancel is not None and cancel.is_set():
+        return {"candidate_id": resume["id"], "candidate_name": resume.get("candidate_name", "Unknown"), **match_data}
+
+    if model_for("prescreen") != model_for("match") and match_data["score"] >= settings.MATCH_FINAL_MIN_SCORE:
+        final_data = await match_resume_to_jd(profile, jd_text, task="match")
+        if final_data["reason"] != "AI Analysis Error":
+            match_data = final_data
+
+    return {
+        "candidate_id": resume["id"],
+        "candidate_name": resume.get("candidate_name", "Unknown"),
+        **match_data
+    }
+
+async def stream_match_resumes(
+    resumes: List[Dict[str, Any]],
+    jd_text: str,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+    cancel: Optional[asyncio.Event] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yields match results in completion order, at most MATCH_CONCURRENCY in flight.
+    Closing the generator early, or setting `cancel` (which also ends the iteration),
+    stops queued candidates from ever reaching Groq. Calls already running in executor
+    threads can't be interrupted: they finish (and are billed), but their large-tier
+    final pass is skipped.
+    """
+    semaphore = asyncio.Semaphore(settings.MATCH_CONCURRENCY)
+    stopped = asyncio.Event()
+
+    async def run(resume: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            return await score_candidate(resume, jd_text, stopped)
+
+    tasks = [asyncio.ensure_future(run(r)) for r in resumes]
+
+    async def stop_on_cancel():
+        await cancel.wait()
+        stopped.set()
+        for task in tasks:
+            task.cancel()
+
+    watcher = asyncio.ensure_future(stop_on_cancel()) if cancel is not None else None
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                result = await next_done
+            except asyncio.CancelledError:
+                if stopped.is_set():
+                    return
+                raise
+            if on_result:
+                on_result(result)
+            yield result
+    finally:
+        stopped.set()
+        for task in tasks:
+            task.cancel()
+        if watcher is not None:
+            watcher.cancel()
+
+async def batch_match_resumes(
+    resumes: List[Dict[str, Any]],
+    jd_text: str,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> List[Dict[str, Any]]:
     """
     Process matches concurrently.
+    `on_result` is called with each result as soon as it is scored, so callers
+    can persist progressively instead of waiting for the slowest candidate.
     """
-    tasks = []
-    
-    for resume in resumes:
-        # Extract relevant fields to keep context small
-        # We need the ID for the result, but logic only needs profile data
-        profile = resume.get("raw_ai_response", {}) 
-        # Add candidate_name if not in raw_ai_response
-        if "candidate_name" not in profile:
-             profile["candidate_name"] = resume.get("candidate_name", "Unknown")
-        if "experience_years" not in profile:
-             profile["experience_years"] = resume.get("experience_years", 0)
-
-        tasks.append(match_resume_to_jd(profile, jd_text))
-    
-    # Run all
-    results_data = await asyncio.gather(*tasks)
-    
-    # Merge results with Resume IDs
-    final_results = []
-    for i, res in enumerate(resumes):
-        match_data = results_data[i]
-        final_results.append({
-            "candidate_id": res["id"],
-            "candidate_name": res.get("candidate_name", "Unknown"),
-            **match_data
-        })
-        
+    final_results = [r async for r in stream_match_resumes(resumes, jd_text, on_result)]
+
     # Sort by score descending
     final_results.sort(key=lambda x: x["score"], reverse=True)
     
@@ -0,0 +1,176 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+from prashne.core.config import settings
+from prashne.core.database import supabase_admin
+
+PROFILE_VERSION = 1
+
+# Columns matching needs; the full raw_ai_response is only read for legacy rows
+CANDIDATE_COLUMNS = "id, candidate_name, experience_years, candidate_profile"
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate (~4 characters per token for English text on Llama tokenizers).
+    """
+    return max(1, (len(text) + 3) // 4)
+
+def _normalize_skills(skills: Any) -> List[str]:
+    if not isinstance(skills, list):
+        return []
+    seen = set()
+    normalized = []
+    for skill in skills:
+        name = " ".join(str(skill).split()).strip(" .,;")
+        if name and name.lower() not in seen:
+            seen.add(name.lower())
+            normalized.append(name)
+    return normalized
+
+def _education_lines(education: Any) -> List[str]:
+    if not isinstance(education, list):
+        return []
+    lines = []
+    for entry in education:
+        if isinstance(entry, dict):
+            line = ", ".join(str(entry[k]) for k in ("degree", "school") if entry.get(k))
+            if entry.get("year"):
+                line += f" ({entry['year']})"
+        else:
+            line = str(entry)
+        if line.strip():
+            lines.append(line.strip())
+    return lines
+
+def _experience_lines(experience: Any) -> List[str]:
+    if not isinstance(experience, list):
+        return []
+    lines = []
+    for entry in experience:
+        if isinstance(entry, dict):
+            line = " at ".join(str(entry[k]) for k in ("title", "company") if entry.get(k))
+            if entry.get("years"):
+                line += f" ({entry['years']} yrs)"
+        else:
+            line = str(entry)
+        if line.strip():
+            lines.append(line.strip())
+    return lines
+
+def _render(name: str, years: Any, skills: List[str], roles: List[str], education: List[str], summary: str) -> str:
+    lines = [f"Name: {name}", f"Experience: {years} years"]
+    if skills:
+        lines.append("Skills: " + ", ".join(skills))
+    if roles:
+        lines.append("Roles: " + "; ".join(roles))
+    if education:
+        lines.append("Education: " + "; ".join(education))
+    if summary:
+        lines.append(f"Summary: {summary}")
+    return "\n".join(lines)
+
+def build_candidate_profile(parsed: Dict[str, Any], candidate_name: Optional[str] = None,
+                            experience_years: Any = None) -> Dict[str, Any]:
+    """
+    Builds the compact, canonical profile stored with a resume at ingest time.
+    `text` is the prompt-ready rendering; it is trimmed to CANDIDATE_PROFILE_MAX_TOKENS
+    by shortening the summary, then dropping roles, trailing skills, the summary and
+    education, and finally by truncating the text itself, so the cap is hard.
+    """
+    parsed = parsed or {}
+    name = candidate_name or parsed.get("full_name") or "Unknown"
+    years = experience_years if experience_years is not None else parsed.get("experience_years")
+    years = years if isinstance(years, (int, float)) else 0
+    skills = _normalize_skills(parsed.get("skills"))
+    roles = _experience_lines(parsed.get("experience"))[:6]
+    education = _education_lines(parsed.get("education"))[:3]
+    summary = " ".join(str(parsed.get("summary") or "").split())[:600]
+
+    budget = settings.CANDIDATE_PROFILE_MAX_TOKENS
+    text = _render(name, years, skills, roles, education, summary)
+    while estimate_tokens(text) > budget:
+        if len(summary) > 203:
+            summary = summary[:200].rsplit(" ", 1)[0] + "..."
+        elif roles:
+            roles = roles[:-1]
+        elif len(skills) > 10:
+            skills = skills[:-5]
+        elif summary:
+            summary = ""
+        elif education:
+            education = education[:-1]
+        else:
+            # Only the name and a few skills left; cut the rendering itself
+            text = text[:budget * 4]
+            break
+        text = _render(name, years, skills, roles, education, summary)
+
+    return {
+        "version": PROFILE_VERSION,
+        "skills": skills,
+        "experience_years": years,
+        "experience": roles,
+        "education": education,
+        "summary": summary,
+        "text": text,
+        "tokens": estimate_tokens(text),
+    }
+
+# Legacy rows whose backfill is queued but not yet written; concurrent matches skip them
+_backfilling: set = set()
+_backfilling_lock = threading.Lock()
+# One writer, so a burst of legacy rows trickles into Supabase instead of fanning out
+_backfill_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="profile-backfill")
+
+def _write_backfill(profiles: Dict[str, Dict[str, Any]]):
+    """
+    Writes only the candidate_profile column, one row per update: a deleted resume
+    matches nothing (so it is never re-inserted) and concurrent edits to other
+    columns are left alone.
+    """
+    try:
+        for resume_id, profile in profiles.items():
+            try:
+                supabase_admin.table("resumes")\
+                    .update({"candidate_profile": profile})\
+                    .eq("id", resume_id)\
+                    .execute()
+            except Exception as e:
+                # Rebuilt and retried the next time the row is matched
+                print(f"Candidate Profile Backfill Error ({resume_id}): {e}")
+    finally:
+        with _backfilling_lock:
+            _backfilling.difference_update(profiles)
+
+def hydrate_candidate_profiles(resumes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Ensures every row (selected with CANDIDATE_COLUMNS) carries a current candidate_profile.
+    Legacy rows are built from raw_ai_response once and written back in the background.
+    """
+    stale = [r for r in resumes if (r.get("candidate_profile") or {}).get("version") != PROFILE_VERSION]
+    if not stale:
+        return resumes
+
+    raw_by_id: Dict[str, Any] = {}
+    stale_ids = [r["id"] for r in stale]
+    for i in range(0, len(stale_ids), 200):
+        res = supabase_admin.table("resumes")\
+            .select("id, raw_ai_response")\
+            .in_("id", stale_ids[i:i + 200])\
+            .execute()
+        raw_by_id.update({row["id"]: row.get("raw_ai_response") for row in res.data or []})
+
+    backfill: Dict[str, Dict[str, Any]] = {}
+    for r in stale:
+        profile = build_candidate_profile(raw_by_id.get(r["id"]) or {}, r.get("candidate_name"), r.get("experience_years"))
+        r["candidate_profile"] = profile
+        if r["id"] in raw_by_id:
+            backfill[r["id"]] = profile
+
+    with _backfilling_lock:
+        backfill = {rid: p for rid, p in backfill.items() if rid not in _backfilling}
+        _backfilling.update(backfill)
+    if backfill:
+        # Never inline: matching shouldn't wait on the write-back
+        _backfill_pool.submit(_write_backfill, backfill)
+    return resumes
@@ -1,5 +1,9 @@
+import re
+import uuid
 import cloudinary
+import cloudinary.api
 import cloudinary.uploader
+from typing import List, Optional, Tuple
 from prashne.core.config import settings
 
 # Configure Cloudinary
@@ -18,7 +22,9 @@ def upload_file_to_cloudinary(file_content: bytes, filename: str) -> str:
         # resource_type="auto" allows pdfs/images
         response = cloudinary.uploader.upload(
             file_content, 
-            public_id=filename.split('.')[0], # Use filename without extension as ID
+            # Filename without extension plus a random suffix: the folder is shared,
+            # so two "Resume.pdf" uploads must not overwrite (or later delete) each other
+            public_id=f"{filename.split('.')[0]}-{uuid.uuid4().hex[:8]}",
             folder="resumes",
             resource_type="auto"
         )
@@ -26,3 +32,25 @@ def upload_file_to_cloudinary(file_content: bytes, filename: str) -> str:
     except Exception as e:
         print(f"Cloudinary Upload Error: {str(e)}")
         raise e
+
+# .../<resource_type>/upload/[transformations/][v123/]<public_id>.<ext>
+CLOUDINARY_URL_RE = re.compile(r"/(image|raw|video)/upload/(?:.*?/)?(?:v\d+/)?([^?#]+?)(?:\.[A-Za-z0-9]+)?(?:[?#].*)?$")
+
+def asset_from_url(url: Optional[str]) -> Optional[Tuple[str, str]]:
+    """
+    Returns (resource_type, public_id) for a Cloudinary delivery URL.
+    """
+    if not url:
+        return None
+    match = CLOUDINARY_URL_RE.search(url)
+    return (match.group(1), match.group(2)) if match else None
+
+def delete_files_from_cloudinary(public_ids: List[str], resource_type: str = "image"):
+    """
+    Deletes up to 100 assets in one Admin API call.
+    """
+    try:
+        cloudinary.api.delete_resources(public_ids, resource_type=resource_type, type="upload")
+    except Exception as e:
+        print(f"Cloudinary Delete Error: {str(e)}")
+        raise e
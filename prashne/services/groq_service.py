@@ -1,43 +1,149 @@
-import json
-from groq import Groq
 from prashne.core.config import settings
-from typing import Dict, Any
+from prashne.core.cache import cache, hash_key
+from prashne.services.pdf_service import extract_resume_fields
+from prashne.services.model_router import complete_json
+from typing import Dict, Any, List, Optional, Tuple
 
-client = Groq(api_key=settings.GROQ_API_KEY)
+# Parsed resumes keyed by text hash; re-uploads of the same PDF skip the LLM
+_parse_cache = cache.namespace("resume_parse")
 
-def parse_resume_with_ai(text: str) -> dict:
+# Fields the LLM is asked for, with the hint shown in the prompt
+LLM_FIELD_HINTS = {
+    "full_name": "full_name (string)",
+    "skills": "skills (list of strings, normalized names)",
+    "experience_years": "experience_years (number, estimate if needed)",
+    "education": "education (list of objects with degree, school, year)",
+    "experience": "experience (list of recent roles: objects with title, company, years)",
+    "summary": "summary (short professional summary)",
+}
+
+# Which resume sections each field needs, in priority order
+FIELD_SECTIONS = {
+    "full_name": ["header"],
+    "skills": ["skills", "experience", "projects"],
+    "experience_years": ["experience"],
+    "education": ["education"],
+    "experience": ["experience"],
+    "summary": ["summary", "experience"],
+}
+
+def build_resume_prompt(text: str, local: Dict[str, Any]) -> Tuple[str, List[str]]:
     """
-    Parses resume text into structured JSON using Groq LLM.
+    Builds a trimmed, section-aware parse prompt.
+    Only fields the local extractor could not resolve are requested, and only the
+    first matching section for each field is sent.
     """
+    sections = local.get("sections", {})
+    resolved = {
+        "full_name": bool(local.get("full_name")),
+        "experience_years": local.get("experience_years") is not None,
+        "summary": bool(sections.get("summary")),
+    }
+    wanted = [f for f in LLM_FIELD_HINTS if not resolved.get(f)]
+
+    budget = settings.RESUME_PROMPT_MAX_CHARS
+    needed = []
+    for field in wanted:
+        name = next((n for n in FIELD_SECTIONS[field] if n in sections), None)
+        if name and name not in needed:
+            needed.append(name)
+
+    if needed:
+        # Split the budget evenly, letting short sections donate their leftovers
+        parts = []
+        remaining = budget
+        for i, name in enumerate(needed):
+            share = remaining // (len(needed) - i)
+            chunk = sections[name][:share]
+            remaining -= len(chunk)
+            parts.append(f"[{name.upper()}]\n{chunk}")
+        body = "\n\n".join(parts)
+    else:
+        # No recognisable headings; fall back to the leading text
+        body = text[:budget]
+
+    fields = "\n".join(f"    - {LLM_FIELD_HINTS[f]}" for f in wanted)
     prompt = f"""
-    You are an expert HR Parser. Extract these exact fields from the resume text below:
-    - full_name (string)
-    - email (string)
-    - phone (string)
-    - skills (list of strings)
-    - experience_years (number, estimate if needed)
-    - education (list of objects with degree, school, year)
-    - summary (short professional summary)
-
-    Resume Text:
-    {text[:15000]}  # Truncate to safe limit
+    You are an expert HR Parser. Extract these exact fields from the resume sections below:
+{fields}
+
+    Resume Sections:
+    {body}
 
     Return ONLY valid JSON. No markdown formatting.
     """
+    return prompt, wanted
+
+def _local_parse_result(local: Dict[str, Any]) -> Dict[str, Any]:
+    sections = local.get("sections", {})
+    return {
+        "full_name": local.get("full_name"),
+        "email": local.get("email"),
+        "phone": local.get("phone"),
+        "links": local.get("links", []),
+        "skills": local.get("skills", []),
+        "experience_years": local.get("experience_years"),
+        "education": None,
+        "experience": None,
+        "summary": sections.get("summary", "")[:500] or None,
+    }
+
+def _valid_parse_output(data: Dict[str, Any]) -> bool:
+    """
+    Schema check used to decide whether a small-model parse needs escalation.
+    """
+    if "skills" in data and not isinstance(data["skills"], list):
+        return False
+    for field in ("education", "experience"):
+        if data.get(field) is not None and not isinstance(data[field], list):
+            return False
+    years = data.get("experience_years")
+    if years is not None and (not isinstance(years, (int, float)) or not 0 <= years <= 60):
+        return False
+    return True
+
+def parse_resume_with_ai(text: str, offline: Optional[bool] = None) -> dict:
+    """
+    Parses resume text into structured JSON.
+    Deterministic fields (email, phone, links, experience from date ranges) are extracted
+    locally first; the Groq LLM only fills in the rest from a trimmed prompt.
+    In offline mode, or if the LLM call fails, the local extraction is returned on its own.
+    """
+    local = extract_resume_fields(text)
+    result = _local_parse_result(local)
+
+    if offline is None:
+        offline = settings.RESUME_PARSE_OFFLINE
+
+    if offline:
+        result["parse_mode"] = "offline"
+        return result
+
+    cache_key = hash_key(text)
+    cached = _parse_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
+    prompt, wanted = build_resume_prompt(text, local)
     try:
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
+        ai_data = complete_json(
+            "parse",
+            [{"role": "user", "content": prompt}],
             temperature=0,
-            response_format={"type": "json_object"}
+            validate=_valid_parse_output
         )
-        
-        result = completion.choices[0].message.content
-        return json.loads(result)
+        for field in wanted:
+            if ai_data.get(field) not in (None, "", []):
+                result[field] = ai_data[field]
+        result["parse_mode"] = "hybrid"
+        _parse_cache.set(cache_key, result, settings.PARSE_CACHE_TTL_SECONDS)
+        return result
     except Exception as e:
         print(f"Groq API Error: {e}")
-        return {"error": "AI Parsing Failed", "details": str(e)}
+        if not (result.get("email") or result.get("full_name") or result.get("skills")):
+            return {"error": "AI Parsing Failed", "details": str(e)}
+        result["parse_mode"] = "offline"
+        return result
 
 def generate_job_description_with_ai(prompt: str) -> Dict[str, Any]:
     """
@@ -57,18 +163,14 @@ def generate_job_description_with_ai(prompt: str) -> Dict[str, Any]:
     """
 
     try:
-        completion = client.chat.completions.create(
-            messages=[
+        return complete_json(
+            "generate",
+            [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": f"Create a job description for: {prompt}"}
             ],
-            model="llama-3.3-70b-versatile",
-            temperature=0.7,
-            response_format={"type": "json_object"}
+            temperature=0.7
         )
-        
-        content = completion.choices[0].message.content
-        return json.loads(content)
     except Exception as e:
         print(f"Groq JD Gen Error: {e}")
         return {"error": str(e)}
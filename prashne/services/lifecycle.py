@@ -0,0 +1,162 @@
+import time
+import queue
+import threading
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Tuple
+from prashne.core.config import settings
+from prashne.core.database import supabase_admin
+from prashne.core.write_buffer import match_writer, resume_writer
+from prashne.core import http_cache
+from prashne.api.deps import tenant_scope
+from prashne.services.prescoring import cancel_job_prescore, cancel_resume_prescore
+from prashne.services.cloudinary_service import asset_from_url, delete_files_from_cloudinary
+
+def _chunks(items: List[Any], size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+class GarbageCollector:
+    """
+    Background worker that removes everything derived from deleted resumes/jobs:
+    match rows, Cloudinary assets and, when the primary delete was refused
+    (e.g. by a foreign key), the rows themselves once their matches are gone.
+    Work is done in GC_CHUNK_SIZE batches with GC_CHUNK_PAUSE_SECONDS between them
+    so a large cleanup never monopolises Supabase.
+    The queue is in-memory; matches it loses on a restart are still removed by the
+    cascading foreign keys (migration 20261019000300_matches_cascade.sql), only
+    unreferenced PDFs can be left behind.
+    """
+
+    def __init__(self):
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, kind: str, ids: List[str], assets: List[Tuple[str, str]], tenant: str, delete_rows: bool = False):
+        self._queue.put({"kind": kind, "ids": ids, "assets": assets, "tenant": tenant, "delete_rows": delete_rows})
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="lifecycle-gc", daemon=True)
+                self._thread.start()
+
+    def _pause(self):
+        time.sleep(settings.GC_CHUNK_PAUSE_SECONDS)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                self._collect(item)
+            except Exception as e:
+                print(f"GC Error ({item['kind']}): {e}")
+            finally:
+                self._queue.task_done()
+
+    def _unreferenced(self, assets: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """
+        Drops assets a surviving resume still points at. Older uploads used the bare
+        filename as public_id, so several rows can share one PDF.
+        """
+        referenced = set()
+        public_ids = list({public_id for _, public_id in assets})
+        try:
+            for chunk in _chunks(public_ids, 50):
+                escaped = (p.replace('"', '\\"') for p in chunk)
+                patterns = ",".join(f'cloudinary_url.like."*/{p}.*"' for p in escaped)
+                res = supabase_admin.table("resumes").select("cloudinary_url").or_(patterns).execute()
+                for row in res.data or []:
+                    asset = asset_from_url(row.get("cloudinary_url"))
+                    if asset:
+                        referenced.add(asset)
+                self._pause()
+        except Exception as e:
+            # Keeping an orphaned PDF is better than deleting one that is still in use
+            print(f"GC: skipping asset deletes, reference check failed: {e}")
+            return []
+        return [a for a in assets if a not in referenced]
+
+    def _collect(self, item: Dict[str, Any]):
+        kind, ids = item["kind"], item["ids"]
+        table = "resumes" if kind == "resume" else "jobs"
+        match_column = "resume_id" if kind == "resume" else "job_id"
+
+        for chunk in _chunks(ids, settings.GC_CHUNK_SIZE):
+            supabase_admin.table("matches").delete().in_(match_column, chunk).execute()
+            if item["delete_rows"]:
+                supabase_admin.table(table).delete().in_("id", chunk).execute()
+            self._pause()
+
+        by_type: Dict[str, List[str]] = defaultdict(list)
+        for resource_type, public_id in self._unreferenced(item["assets"]):
+            by_type[resource_type].append(public_id)
+        for resource_type, public_ids in by_type.items():
+            # Cloudinary's Admin API accepts at most 100 public ids per call
+            for chunk in _chunks(public_ids, min(100, settings.GC_CHUNK_SIZE)):
+                try:
+                    delete_files_from_cloudinary(chunk, resource_type)
+                except Exception:
+                    pass  # Logged by the service; an orphaned PDF is not worth failing the sweep
+                self._pause()
+
+        # Match history/shortlists changed once the matches are gone
+        http_cache.bump_version(item["tenant"])
+        print(f"GC: cleaned up {len(ids)} {table} and {len(item['assets'])} assets")
+
+collector = GarbageCollector()
+
+def _delete_entities(kind: str, ids: List[str], current_user: Dict[str, Any]) -> Dict[str, Any]:
+    table = "resumes" if kind == "resume" else "jobs"
+    columns = "id, cloudinary_url" if kind == "resume" else "id"
+
+    # 1. Only ids the caller's tenant owns
+    found: List[Dict[str, Any]] = []
+    for chunk in _chunks(list(dict.fromkeys(ids)), settings.GC_CHUNK_SIZE):
+        res = tenant_scope(supabase_admin.table(table).select(columns).in_("id", chunk), current_user).execute()
+        found.extend(res.data or [])
+    owned = [row["id"] for row in found]
+    if not owned:
+        return {"deleted": 0, "not_found": len(set(ids)), "status": "deleted"}
+
+    # 2. Stop producing derived data for them; matches still being scored
+    #    (by /match or a sweep) are rejected by the buffer instead of landing after the GC
+    match_column = "resume_id" if kind == "resume" else "job_id"
+    match_writer.block(match_column, owned)
+    if kind == "job":
+        for job_id in owned:
+            cancel_job_prescore(job_id)
+    else:
+        # Journaled upserts of these resumes must not re-insert them after the delete
+        resume_writer.block("id", owned)
+        cancel_resume_prescore(owned)
+
+    # 3. Remove the rows now so they disappear from lists; if a foreign key refuses,
+    #    the collector deletes them after their matches
+    delete_rows = False
+    try:
+        for chunk in _chunks(owned, settings.GC_CHUNK_SIZE):
+            supabase_admin.table(table).delete().in_("id", chunk).execute()
+    except Exception as e:
+        print(f"Bulk Delete ({table}) deferred to GC: {e}")
+        delete_rows = True
+
+    assets = [a for a in (asset_from_url(row.get("cloudinary_url")) for row in found) if a]
+    collector.enqueue(kind, owned, assets, http_cache.tenant_key(current_user), delete_rows=delete_rows)
+    http_cache.bump_tenant(current_user)
+
+    return {
+        "deleted": len(owned),
+        "not_found": len(set(ids)) - len(owned),
+        "status": "queued" if delete_rows else "deleted"
+    }
+
+def delete_resumes(ids: List[str], current_user: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Deletes the caller's tenant's resumes and queues cleanup of their matches and PDFs.
+    """
+    return _delete_entities("resume", ids, current_user)
+
+def delete_jobs(ids: List[str], current_user: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Deletes the caller's tenant's jobs and queues cleanup of their matches.
+    """
+    return _delete_entities("job", ids, current_user)
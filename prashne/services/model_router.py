@@ -0,0 +1,128 @@
+import json
+import time
+import threading
+from typing import Dict, Any, List, Optional, Callable
+from groq import Groq
+from prashne.core.config import settings
+
+client = Groq(api_key=settings.GROQ_API_KEY)
+
+# Tier -> concrete Groq model
+MODEL_TIERS = {
+    "small": settings.GROQ_SMALL_MODEL,
+    "large": settings.GROQ_LARGE_MODEL,
+}
+
+# Task -> tier. Simple extraction and pre-screening go to the fast model,
+# user-facing match reasons and generation stay on the large one.
+TASK_TIERS = {
+    "parse": settings.MODEL_TIER_PARSE,
+    "prescreen": settings.MODEL_TIER_PRESCREEN,
+    "match": settings.MODEL_TIER_MATCH,
+    "generate": settings.MODEL_TIER_GENERATE,
+}
+
+ESCALATION_TIER = "large"
+
+def _tier_for(task: str) -> str:
+    tier = TASK_TIERS.get(task, ESCALATION_TIER)
+    return tier if tier in MODEL_TIERS else ESCALATION_TIER
+
+def model_for(task: str) -> str:
+    """Concrete model a task's first attempt runs on (tiers are only labels)."""
+    return MODEL_TIERS[_tier_for(task)]
+
+class ModelOutputError(ValueError):
+    """Raised when a model response is not valid JSON or fails validation."""
+
+_metrics_lock = threading.Lock()
+_metrics: Dict[str, Dict[str, Any]] = {}
+
+def _record(task: str, tier: str, latency_ms: float, usage: Any = None, failed: bool = False, escalated: bool = False):
+    key = f"{task}:{tier}"
+    with _metrics_lock:
+        m = _metrics.setdefault(key, {
+            "task": task,
+            "tier": tier,
+            "model": MODEL_TIERS.get(tier),
+            "calls": 0,
+            "failures": 0,
+            "escalations": 0,
+            "total_latency_ms": 0.0,
+            "max_latency_ms": 0.0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+        })
+        m["calls"] += 1
+        m["failures"] += int(failed)
+        m["escalations"] += int(escalated)
+        m["total_latency_ms"] += latency_ms
+        m["max_latency_ms"] = max(m["max_latency_ms"], latency_ms)
+        if usage is not None:
+            m["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+            m["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+
+def get_metrics() -> List[Dict[str, Any]]:
+    """
+    Snapshot of per task/tier latency and token usage since process start.
+    """
+    with _metrics_lock:
+        snapshot = [dict(m) for m in _metrics.values()]
+    for m in snapshot:
+        m["avg_latency_ms"] = round(m["total_latency_ms"] / m["calls"], 1) if m["calls"] else 0.0
+        m["total_latency_ms"] = round(m["total_latency_ms"], 1)
+        m["max_latency_ms"] = round(m["max_latency_ms"], 1)
+    return sorted(snapshot, key=lambda m: (m["task"], m["tier"]))
+
+def reset_metrics():
+    with _metrics_lock:
+        _metrics.clear()
+
+def _call(task: str, tier: str, messages: List[Dict[str, str]], temperature: float,
+          validate: Optional[Callable[[Dict[str, Any]], bool]]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    usage = None
+    try:
+        completion = client.chat.completions.create(
+            model=MODEL_TIERS[tier],
+            messages=messages,
+            temperature=temperature,
+            response_format={"type": "json_object"}
+        )
+        usage = getattr(completion, "usage", None)
+        try:
+            data = json.loads(completion.choices[0].message.content)
+        except (TypeError, json.JSONDecodeError) as e:
+            raise ModelOutputError(f"Invalid JSON from {MODEL_TIERS[tier]}: {e}")
+        if not isinstance(data, dict) or (validate and not validate(data)):
+            raise ModelOutputError(f"Output from {MODEL_TIERS[tier]} failed validation")
+    except ModelOutputError:
+        _record(task, tier, (time.perf_counter() - started) * 1000, usage, failed=True,
+                escalated=tier != ESCALATION_TIER)
+        raise
+    except Exception:
+        _record(task, tier, (time.perf_counter() - started) * 1000, usage, failed=True)
+        raise
+
+    _record(task, tier, (time.perf_counter() - started) * 1000, usage)
+    return data
+
+def complete_json(task: str, messages: List[Dict[str, str]], temperature: float = 0,
+                  validate: Optional[Callable[[Dict[str, Any]], bool]] = None) -> Dict[str, Any]:
+    """
+    Runs a JSON-mode chat completion on the model configured for `task`.
+    If a smaller tier returns invalid JSON or fails `validate`, the request is
+    retried once on the large tier. API and transport errors (rate limits, timeouts)
+    are raised as-is: moving them onto the larger, more tightly limited model
+    would only double the calls.
+    """
+    tier = _tier_for(task)
+
+    try:
+        return _call(task, tier, messages, temperature, validate)
+    except ModelOutputError as e:
+        if tier == ESCALATION_TIER:
+            raise
+        print(f"Model Router: escalating '{task}' from {tier} to {ESCALATION_TIER}: {e}")
+
+    return _call(task, ESCALATION_TIER, messages, temperature, validate)
@@ -1,5 +1,8 @@
 import pypdf
 import io
+import re
+from datetime import date
+from typing import Dict, Any, List, Optional, Tuple
 
 def extract_text_from_pdf(file_content: bytes) -> str:
     """
@@ -10,10 +13,168 @@ def extract_text_from_pdf(file_content: bytes) -> str:
         text = ""
         for page in reader.pages:
             text += page.extract_text() + "\n"
-        
+
         if not text.strip():
             raise ValueError("Empty PDF or OCR required")
-            
+
         return text
     except Exception as e:
         raise ValueError(f"PDF extraction failed: {str(e)}")
+
+# ---------------------------------------------------------------------------
+# Deterministic field extraction (runs before / instead of the LLM)
+# ---------------------------------------------------------------------------
+
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+PHONE_RE = re.compile(r"(?<![\w/])(\+?\d[\d\s().-]{7,}\d)(?![\w/])")
+LINK_RE = re.compile(r"(?:https?://|www\.)[^\s,;|<>()]+|(?:linkedin\.com|github\.com)/[^\s,;|<>()]+", re.IGNORECASE)
+
+# Heading aliases -> canonical section name
+SECTION_ALIASES = {
+    "summary": ["summary", "professional summary", "profile", "about me", "objective", "career objective"],
+    "experience": ["experience", "work experience", "professional experience", "employment history", "work history", "employment"],
+    "education": ["education", "academic background", "academics", "qualifications", "education and training"],
+    "skills": ["skills", "technical skills", "core skills", "key skills", "skills and tools", "technologies", "core competencies"],
+    "projects": ["projects", "personal projects", "key projects"],
+    "certifications": ["certifications", "certificates", "licenses and certifications"],
+}
+_HEADING_LOOKUP = {alias: name for name, aliases in SECTION_ALIASES.items() for alias in aliases}
+
+_MONTHS = {m: i + 1 for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+)}
+_DATE_TOKEN = r"(?:(?:[A-Za-z]{3,9}\.?\s+)?\d{4}|\d{1,2}/\d{4})"
+DATE_RANGE_RE = re.compile(
+    rf"({_DATE_TOKEN})\s*(?:-|–|—|to|until)\s*({_DATE_TOKEN}|present|current|now|today)",
+    re.IGNORECASE,
+)
+
+def _normalize_heading(line: str) -> Optional[str]:
+    candidate = re.sub(r"[^a-z ]", "", line.lower()).strip()
+    candidate = re.sub(r"\s+", " ", candidate)
+    if not candidate or len(candidate) > 40:
+        return None
+    return _HEADING_LOOKUP.get(candidate)
+
+def split_sections(text: str) -> Dict[str, str]:
+    """
+    Splits resume text into sections keyed by canonical heading.
+    Anything before the first recognised heading goes under 'header'.
+    """
+    sections: Dict[str, List[str]] = {"header": []}
+    current = "header"
+    for line in text.splitlines():
+        heading = _normalize_heading(line)
+        if heading:
+            current = heading
+            sections.setdefault(current, [])
+            continue
+        sections[current].append(line)
+
+    return {name: "\n".join(lines).strip() for name, lines in sections.items() if "\n".join(lines).strip()}
+
+def _parse_date_token(token: str, today: date) -> Optional[Tuple[int, int]]:
+    token = token.strip().lower().rstrip(".")
+    if token in ("present", "current", "now", "today"):
+        return today.year, today.month
+    if "/" in token:
+        month, year = token.split("/")
+        return int(year), max(1, min(12, int(month)))
+    parts = token.split()
+    year = int(parts[-1])
+    month = _MONTHS.get(parts[0][:3], 1) if len(parts) > 1 else 1
+    return year, month
+
+def estimate_experience_years(text: str, today: Optional[date] = None) -> Optional[float]:
+    """
+    Estimates total years of experience from date ranges (e.g. 'Jan 2019 - Present').
+    Overlapping roles are merged so concurrent jobs are not double counted.
+    """
+    today = today or date.today()
+    spans = []
+    for start_raw, end_raw in DATE_RANGE_RE.findall(text):
+        try:
+            start = _parse_date_token(start_raw, today)
+            end = _parse_date_token(end_raw, today)
+        except (ValueError, IndexError):
+            continue
+        if not start or not end or not (1950 <= start[0] <= today.year):
+            continue
+        start_idx = start[0] * 12 + start[1] - 1
+        end_idx = min(end[0] * 12 + end[1] - 1, today.year * 12 + today.month - 1)
+        if end_idx >= start_idx:
+            spans.append((start_idx, end_idx))
+
+    if not spans:
+        return None
+
+    spans.sort()
+    months = 0
+    cur_start, cur_end = spans[0]
+    for s, e in spans[1:]:
+        if s <= cur_end + 1:
+            cur_end = max(cur_end, e)
+        else:
+            months += cur_end - cur_start + 1
+            cur_start, cur_end = s, e
+    months += cur_end - cur_start + 1
+    return round(months / 12, 1)
+
+def _guess_name(header: str) -> Optional[str]:
+    for line in header.splitlines()[:5]:
+        line = line.strip()
+        if not line or EMAIL_RE.search(line) or PHONE_RE.search(line) or LINK_RE.search(line):
+            continue
+        words = line.split()
+        if 1 < len(words) <= 5 and all(w[:1].isalpha() for w in words):
+            return line.title() if line.isupper() else line
+    return None
+
+def _split_skills(skills_text: str) -> List[str]:
+    skills = []
+    seen = set()
+    for chunk in re.split(r"[,\n|•·;]", skills_text):
+        chunk = chunk.split(":")[-1].strip(" -*\t")
+        if 1 < len(chunk) <= 40 and chunk.lower() not in seen:
+            seen.add(chunk.lower())
+            skills.append(chunk)
+    return skills
+
+def extract_resume_fields(text: str) -> Dict[str, Any]:
+    """
+    Regex/heuristic extraction of resume fields that don't need an LLM.
+    Returns email, phone, links, section texts and an experience estimate
+    (None unless there is an Experience section), plus best-effort name/skills
+    for offline parsing.
+    """
+    sections = split_sections(text)
+
+    email_match = EMAIL_RE.search(text)
+    phone = None
+    for candidate in PHONE_RE.findall(text):
+        digits = re.sub(r"\D", "", candidate)
+        # Skip date ranges like '2019 - 2021' that look like numbers
+        if 10 <= len(digits) <= 15 and not DATE_RANGE_RE.search(candidate):
+            phone = candidate.strip()
+            break
+
+    links = []
+    for link in LINK_RE.findall(text):
+        link = link.rstrip(".")
+        if link not in links:
+            links.append(link)
+
+    # Only dated work history counts; education/certification ranges elsewhere would
+    # inflate it. Without an Experience heading the LLM is asked instead.
+    experience_text = sections.get("experience", "")
+    experience_years = estimate_experience_years(experience_text) if experience_text else None
+
+    return {
+        "full_name": _guess_name(sections.get("header", "")),
+        "email": email_match.group(0) if email_match else None,
+        "phone": phone,
+        "links": links,
+        "skills": _split_skills(sections["skills"]) if "skills" in sections else [],
+        "experience_years": experience_years,
+        "sections": sections,
+    }
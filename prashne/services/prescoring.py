@@ -0,0 +1,159 @@
+import asyncio
+from typing import Dict, Any, List, Optional, Set
+from starlette.concurrency import run_in_threadpool
+from prashne.core.config import settings
+from prashne.core.database import supabase_admin
+from prashne.core.write_buffer import match_writer
+from prashne.api.deps import tenant_scope
+from prashne.services.ai_matching import stream_match_resumes
+from prashne.services.candidate_profile import CANDIDATE_COLUMNS, hydrate_candidate_profiles
+
+# job_id -> running sweep; a newer create/update for the same job cancels the stale one
+_job_sweeps: Dict[str, asyncio.Task] = {}
+# Running resume sweep -> ids it still has to score; deletes shrink it or cancel the sweep
+_resume_sweeps: Dict[asyncio.Task, Set[str]] = {}
+# Strong refs so sweeps aren't garbage collected mid-run
+_background: set = set()
+
+JOB_COLUMNS = "id, title, description, requirements"
+
+def job_to_jd_text(job: Dict[str, Any]) -> str:
+    """
+    Renders a stored job row as the JD text the matcher expects.
+    """
+    parts = [job.get("title") or "", job.get("description") or ""]
+    requirements = job.get("requirements") or []
+    if requirements:
+        parts.append("Requirements:\n" + "\n".join(f"- {r}" for r in requirements))
+    return "\n\n".join(p for p in parts if p)
+
+def _spawn(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+    return task
+
+async def _score_into_matches(resumes: List[Dict[str, Any]], job: Dict[str, Any],
+                              company_id: Optional[str], user_id: str) -> int:
+    def save(r: Dict[str, Any]):
+        match_writer.add({
+            "job_id": job["id"],
+            "resume_id": r["candidate_id"],
+            "match_score": r["score"],
+            "match_reason": r["reason"],
+            "created_by": user_id,
+            "company_id": company_id
+        })
+
+    scored = 0
+    async for _ in stream_match_resumes(resumes, job_to_jd_text(job), on_result=save):
+        scored += 1
+    await run_in_threadpool(match_writer.flush)
+    return scored
+
+async def _sweep_job(job: Dict[str, Any], company_id: Optional[str], user_id: str, rescore: bool):
+    try:
+        query = supabase_admin.table("resumes").select(CANDIDATE_COLUMNS)
+        query = tenant_scope(query, {"company_id": company_id, "sub": user_id})\
+            .order("created_at", desc=True).limit(settings.PRESCORE_MAX_CANDIDATES)
+        resumes = (await run_in_threadpool(query.execute)).data or []
+
+        if not rescore and resumes:
+            # Only candidates this job hasn't scored yet
+            done_res = await run_in_threadpool(
+                supabase_admin.table("matches").select("resume_id").eq("job_id", job["id"]).execute
+            )
+            done = {m["resume_id"] for m in done_res.data or []}
+            resumes = [r for r in resumes if r["id"] not in done]
+
+        if resumes:
+            resumes = await run_in_threadpool(hydrate_candidate_profiles, resumes)
+            scored = await _score_into_matches(resumes, job, company_id, user_id)
+            print(f"Prescoring: job {job['id']} scored {scored} candidates")
+    except asyncio.CancelledError:
+        print(f"Prescoring: sweep for job {job['id']} superseded")
+        raise
+    except Exception as e:
+        print(f"Prescoring Error (job {job.get('id')}): {e}")
+    finally:
+        if _job_sweeps.get(job["id"]) is asyncio.current_task():
+            del _job_sweeps[job["id"]]
+
+async def schedule_job_prescore(job: Dict[str, Any], company_id: Optional[str], user_id: str, rescore: bool = False):
+    """
+    Scores the company's candidate pool against a created/updated job.
+    Meant to run as a FastAPI background task after the response is sent. The sweep
+    runs as its own task so a newer update or a delete can cancel it, but is awaited
+    here: on serverless hosts the function is frozen once its background tasks return.
+    """
+    if not settings.PRESCORE_ENABLED or not job.get("id"):
+        return
+    previous = _job_sweeps.get(job["id"])
+    if previous and not previous.done():
+        previous.cancel()
+    sweep = _job_sweeps[job["id"]] = _spawn(_sweep_job(job, company_id, user_id, rescore))
+    # wait() doesn't raise when the sweep is cancelled by a newer update
+    await asyncio.wait({sweep})
+
+def cancel_job_prescore(job_id: str):
+    """
+    Stops a running sweep, e.g. because the job was deleted.
+    Safe to call from sync routes running on the thread pool.
+    """
+    sweep = _job_sweeps.pop(job_id, None)
+    if sweep and not sweep.done():
+        sweep.get_loop().call_soon_threadsafe(sweep.cancel)
+
+async def _sweep_resumes(resume_ids: List[str], company_id: Optional[str], user_id: str):
+    live = _resume_sweeps.setdefault(asyncio.current_task(), set(resume_ids))
+    try:
+        query = supabase_admin.table("jobs").select(JOB_COLUMNS)
+        query = tenant_scope(query, {"company_id": company_id, "sub": user_id})\
+            .order("created_at", desc=True).limit(settings.PRESCORE_MAX_JOBS)
+        jobs = (await run_in_threadpool(query.execute)).data or []
+        if not jobs:
+            return
+
+        res = await run_in_threadpool(
+            supabase_admin.table("resumes").select(CANDIDATE_COLUMNS).in_("id", resume_ids).execute
+        )
+        resumes = res.data or []
+        if not resumes:
+            return
+        resumes = await run_in_threadpool(hydrate_candidate_profiles, resumes)
+
+        for job in jobs:
+            # Skip candidates deleted since the sweep started
+            resumes = [r for r in resumes if r["id"] in live]
+            if not resumes:
+                break
+            await _score_into_matches(resumes, job, company_id, user_id)
+        print(f"Prescoring: {len(resumes)} new resumes scored against {len(jobs)} jobs")
+    except asyncio.CancelledError:
+        print("Prescoring: resume sweep cancelled, its candidates were deleted")
+        raise
+    except Exception as e:
+        print(f"Prescoring Error (resumes): {e}")
+    finally:
+        _resume_sweeps.pop(asyncio.current_task(), None)
+
+async def schedule_resume_prescore(resume_ids: List[str], company_id: Optional[str], user_id: str):
+    """
+    Scores newly uploaded resumes against the company's most recent jobs.
+    Awaited for the same reason as schedule_job_prescore.
+    """
+    if not settings.PRESCORE_ENABLED or not resume_ids:
+        return
+    await asyncio.wait({_spawn(_sweep_resumes(resume_ids, company_id, user_id))})
+
+def cancel_resume_prescore(resume_ids: List[str]):
+    """
+    Drops deleted resumes from running sweeps; a sweep left with nothing to score is cancelled.
+    Safe to call from sync routes running on the thread pool.
+    """
+    deleted = set(resume_ids)
+    for sweep, live in list(_resume_sweeps.items()):
+        if live & deleted:
+            live -= deleted
+            if not live and not sweep.done():
+                sweep.get_loop().call_soon_threadsafe(sweep.cancel)
@@ -0,0 +1,36 @@
+-- Plan check for the tenant-scoped hot paths (run with: psql "$DATABASE_URL" -f supabase/checks/tenant_query_plans.sql,
+-- or via tests/test_query_plans.py with TEST_DATABASE_URL set).
+-- Sequential scans are disabled so the planner must use an index if one can serve the query;
+-- any remaining Seq Scan means a list/history endpoint would scan the whole platform's data.
+
+begin;
+set local enable_seqscan = off;
+
+do $$
+declare
+    probe uuid := gen_random_uuid();
+    q text;
+    plan json;
+    queries text[] := array[
+        format('select * from public.jobs where company_id = %L order by created_at desc', probe),
+        format('select * from public.jobs where created_by = %L order by created_at desc', probe),
+        format('select * from public.resumes where created_by = %L order by created_at desc', probe),
+        format('select id from public.resumes where created_by = %L', probe),
+        format('select * from public.matches where company_id = %L order by created_at desc limit 100', probe),
+        format('select * from public.matches where created_by = %L order by created_at desc limit 100', probe),
+        format('select * from public.matches where job_id = %L order by match_score desc limit 50', probe)
+    ];
+begin
+    foreach q in array queries loop
+        execute 'explain (format json) ' || q into plan;
+        if plan::text like '%"Seq Scan"%' then
+            raise exception 'Sequential scan in plan for: %', q;
+        end if;
+        if plan::text like '%"Node Type": "Sort"%' then
+            raise warning 'Explicit sort (index order not used) for: %', q;
+        end if;
+    end loop;
+    raise notice 'All % tenant-scoped queries are index-backed', array_length(queries, 1);
+end $$;
+
+rollback;
@@ -0,0 +1,36 @@
+-- Tenant-scoped access paths for jobs, resumes and matches.
+-- List/history endpoints filter on company_id (or created_by for users without a company)
+-- and order by created_at desc, so every hot query is served by a composite index.
+
+-- 1. Tenant columns
+alter table public.jobs    add column if not exists company_id uuid references public.companies(id) on delete cascade;
+alter table public.jobs    add column if not exists created_by uuid references auth.users(id) on delete set null;
+alter table public.resumes add column if not exists company_id uuid references public.companies(id) on delete cascade;
+alter table public.matches add column if not exists company_id uuid references public.companies(id) on delete cascade;
+
+-- 2. Backfill from the creator's profile (legacy jobs have no creator; see 20261019000200_backfill_legacy_jobs.sql)
+update public.resumes r
+   set company_id = p.company_id
+  from public.profiles p
+ where r.created_by = p.id
+   and r.company_id is null;
+
+update public.matches m
+   set company_id = p.company_id
+  from public.profiles p
+ where m.created_by = p.id
+   and m.company_id is null;
+
+-- 3. Composite indexes
+create index if not exists jobs_company_created_idx       on public.jobs    (company_id, created_at desc);
+create index if not exists jobs_created_by_created_idx    on public.jobs    (created_by, created_at desc);
+
+create index if not exists resumes_company_created_idx    on public.resumes (company_id, created_at desc);
+create index if not exists resumes_created_by_created_idx on public.resumes (created_by, created_at desc);
+
+create index if not exists matches_company_created_idx    on public.matches (company_id, created_at desc);
+create index if not exists matches_created_by_created_idx on public.matches (created_by, created_at desc);
+create index if not exists matches_job_score_idx          on public.matches (job_id, match_score desc);
+create index if not exists matches_resume_idx             on public.matches (resume_id);
+
+create index if not exists profiles_company_idx           on public.profiles (company_id);
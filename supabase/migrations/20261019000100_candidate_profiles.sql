@@ -0,0 +1,5 @@
+-- Compact, prompt-ready candidate profile built at ingest time (see services/candidate_profile.py).
+-- Matching reads only this column instead of select('*') on resumes.
+-- Existing rows are backfilled lazily the first time they are matched.
+
+alter table public.resumes add column if not exists candidate_profile jsonb;
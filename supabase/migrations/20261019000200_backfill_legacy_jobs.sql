@@ -0,0 +1,35 @@
+-- Give legacy jobs (created before jobs carried a tenant) an owner.
+-- Tenant-scoped queries filter on company_id / created_by, so a job with neither
+-- is invisible to every HR user and can no longer be updated or deleted.
+
+-- 1. Creator: whoever first matched candidates against the job
+update public.jobs j
+   set created_by = first_match.created_by
+  from (
+        select distinct on (job_id) job_id, created_by
+          from public.matches
+         where created_by is not null
+         order by job_id, created_at asc
+       ) first_match
+ where first_match.job_id = j.id
+   and j.created_by is null;
+
+-- 2. Company: from the creator's profile
+update public.jobs j
+   set company_id = p.company_id
+  from public.profiles p
+ where j.created_by = p.id
+   and j.company_id is null;
+
+-- 3. Single-tenant installs: everything left belongs to the only company
+update public.jobs j
+   set company_id = c.id
+  from public.companies c
+ where j.company_id is null
+   and j.created_by is null
+   and (select count(*) from public.companies) = 1;
+
+-- Anything still unowned is listed by GET /api/admin/unscoped-jobs and assigned to a
+-- company with POST /api/admin/unscoped-jobs/assign (super admin only).
+create index if not exists jobs_unscoped_idx on public.jobs (created_at desc)
+    where company_id is null and created_by is null;
@@ -0,0 +1,39 @@
+-- Matches are derived from a resume and a job, so they go with either.
+-- The lifecycle collector (services/lifecycle.py) deletes them in throttled batches,
+-- but its queue lives in process memory: a restart or a frozen serverless function
+-- drops queued work. Cascading foreign keys make the database the backstop.
+
+-- 1. Remove matches orphaned by earlier deletes (otherwise the constraints cannot validate)
+delete from public.matches m
+ where not exists (select 1 from public.resumes r where r.id = m.resume_id)
+    or not exists (select 1 from public.jobs j where j.id = m.job_id);
+
+-- 2. Replace whatever foreign keys matches.resume_id / matches.job_id already have
+do $$
+declare
+    fk record;
+begin
+    for fk in
+        select c.conname
+          from pg_constraint c
+          join pg_attribute a on a.attrelid = c.conrelid and a.attnum = any (c.conkey)
+         where c.conrelid = 'public.matches'::regclass
+           and c.contype = 'f'
+           and a.attname in ('resume_id', 'job_id')
+    loop
+        execute format('alter table public.matches drop constraint %I', fk.conname);
+    end loop;
+end $$;
+
+-- 3. Add them back with on delete cascade; NOT VALID + VALIDATE avoids a long exclusive lock
+alter table public.matches
+    add constraint matches_resume_id_fkey foreign key (resume_id)
+    references public.resumes(id) on delete cascade not valid;
+alter table public.matches
+    add constraint matches_job_id_fkey foreign key (job_id)
+    references public.jobs(id) on delete cascade not valid;
+
+alter table public.matches validate constraint matches_resume_id_fkey;
+alter table public.matches validate constraint matches_job_id_fkey;
+
+-- Cascades look rows up through matches_resume_idx / matches_job_score_idx (20261019000000).
@@ -0,0 +1,9 @@
+import os
+
+# Settings requires these at import time; tests never talk to the real services
+for name in (
+    "SUPABASE_URL", "SUPABASE_KEY", "JWT_SECRET", "SUPABASE_SERVICE_ROLE_KEY", "GROQ_API_KEY",
+    "CLOUDINARY_CLOUD_NAME", "CLOUDINARY_API_KEY", "CLOUDINARY_API_SECRET",
+):
+    # JWT-shaped so the Supabase client accepts the keys
+    os.environ.setdefault(name, "http://localhost:54321" if name == "SUPABASE_URL" else "eyJhbGciOiJIUzI1NiJ9.e30.test")
@@ -0,0 +1,77 @@
+import os
+import time
+import pytest
+from prashne.core.cache import Cache, MemoryBackend, RedisBackend, SQLiteBackend
+
+REDIS_URL = os.environ.get("TEST_REDIS_URL", "redis://localhost:6379/15")
+
+def _redis_backend():
+    try:
+        backend = RedisBackend(REDIS_URL)
+        backend._client.ping()
+    except Exception as e:
+        pytest.skip(f"No Redis server at {REDIS_URL}: {e}")
+    backend._client.flushdb()
+    return backend
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend()
+    if request.param == "sqlite":
+        return SQLiteBackend(str(tmp_path / "cache.sqlite3"))
+    return _redis_backend()
+
+def test_get_set_delete(backend):
+    assert backend.get("k") is None
+    backend.set("k", b"v")
+    assert backend.get("k") == b"v"
+    backend.delete("k")
+    assert backend.get("k") is None
+
+def test_ttl_expires(backend):
+    backend.set("k", b"v", ttl=0.05)
+    assert backend.get("k") == b"v"
+    time.sleep(0.1)
+    assert backend.get("k") is None
+
+def test_counter_is_readable_and_monotonic(backend):
+    first = backend.incr("c")
+    assert backend.incr("c") == first + 1
+    assert int(backend.get("c")) == first + 1
+
+def test_recreated_counter_never_reuses_values(backend):
+    first = backend.incr("c")
+    backend.delete("c")
+    assert backend.incr("c") > first
+
+def test_memory_counters_survive_lru_eviction():
+    backend = MemoryBackend(max_entries=10)
+    version = backend.incr("version")
+    for i in range(100):
+        backend.set(f"k{i}", b"v")
+    assert backend.incr("version") == version + 1
+    assert backend.get("k0") is None
+
+def test_namespace_invalidate_drops_entries(backend):
+    cache = Cache(backend, prefix="test", generation_refresh=0)
+    ns = cache.namespace("things")
+    ns.set("a", {"x": 1})
+    assert ns.get("a") == {"x": 1}
+    ns.invalidate()
+    assert ns.get("a") is None
+
+def test_namespace_counter_restarts_above_old_values(backend):
+    cache = Cache(backend, prefix="test", generation_refresh=0)
+    ns = cache.namespace("versions")
+    old = ns.incr("tenant")
+    ns.invalidate()
+    assert ns.counter("tenant") == 0
+    assert ns.incr("tenant") > old
+
+def test_sqlite_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    a, b = SQLiteBackend(path), SQLiteBackend(path)
+    a.set("k", b"v")
+    assert b.get("k") == b"v"
+    assert b.incr("c") + 1 == a.incr("c")
@@ -0,0 +1,64 @@
+from datetime import date
+from prashne.services.pdf_service import (
+    estimate_experience_years,
+    extract_resume_fields,
+    split_sections,
+)
+
+TODAY = date(2026, 10, 1)
+
+RESUME = """JANE DOE
+jane.doe@example.com | +1 (555) 123-4567 | linkedin.com/in/janedoe
+
+Summary
+Backend engineer focused on data pipelines.
+
+Work Experience
+Senior Engineer, Acme  Jan 2020 - Present
+Engineer, Initech  Mar 2017 - Dec 2019
+
+Education
+B.Tech Computer Science  2013 - 2017
+
+Skills
+Python, PostgreSQL, Docker
+"""
+
+def test_split_sections_uses_canonical_headings():
+    sections = split_sections(RESUME)
+    assert set(sections) == {"header", "summary", "experience", "education", "skills"}
+    assert "Acme" in sections["experience"]
+    assert "B.Tech" in sections["education"]
+
+def test_estimate_merges_overlapping_ranges():
+    text = "Jan 2018 - Dec 2019\nJun 2019 - Dec 2020"
+    assert estimate_experience_years(text, today=TODAY) == 3.0
+
+def test_estimate_caps_open_ranges_at_today():
+    assert estimate_experience_years("Oct 2025 - Present", today=TODAY) == 1.1
+
+def test_estimate_without_ranges_is_none():
+    assert estimate_experience_years("Python, SQL", today=TODAY) is None
+
+def test_extract_ignores_education_ranges():
+    fields = extract_resume_fields(RESUME)
+    # 2017-03 .. today only; the 2013 - 2017 degree is not work experience
+    assert fields["experience_years"] == estimate_experience_years(
+        split_sections(RESUME)["experience"]
+    )
+    assert fields["experience_years"] < date.today().year - 2013
+
+def test_extract_without_experience_section_leaves_years_unresolved():
+    text = "John Smith\njohn@example.com\n\nEducation\nB.Tech, IIT  2014 - 2018\n"
+    assert extract_resume_fields(text)["experience_years"] is None
+
+def test_extract_contact_fields():
+    fields = extract_resume_fields(RESUME)
+    assert fields["full_name"] == "Jane Doe"
+    assert fields["email"] == "jane.doe@example.com"
+    assert fields["phone"] == "+1 (555) 123-4567"
+    assert fields["links"] == ["linkedin.com/in/janedoe"]
+    assert fields["skills"] == ["Python", "PostgreSQL", "Docker"]
+
+def test_phone_skips_date_ranges():
+    assert extract_resume_fields("Experience\n2019 - 2021\n")["phone"] is None
@@ -0,0 +1,21 @@
+import os
+import shutil
+import subprocess
+from pathlib import Path
+import pytest
+
+DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+SCRIPT = Path(__file__).resolve().parent.parent / "supabase" / "checks" / "tenant_query_plans.sql"
+
+@pytest.mark.skipif(not DATABASE_URL, reason="TEST_DATABASE_URL not set")
+@pytest.mark.skipif(shutil.which("psql") is None, reason="psql not installed")
+def test_tenant_queries_are_index_backed():
+    """
+    Runs the EXPLAIN check against a migrated database; it raises on any Seq Scan.
+    """
+    proc = subprocess.run(
+        ["psql", DATABASE_URL, "-v", "ON_ERROR_STOP=1", "-X", "-q", "-f", str(SCRIPT)],
+        capture_output=True, text=True, timeout=60,
+    )
+    assert proc.returncode == 0, proc.stderr
+    assert "All" in proc.stderr and "index-backed" in proc.stderr
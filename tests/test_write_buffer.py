@@ -0,0 +1,116 @@
+import json
+import pytest
+from prashne.core import write_buffer
+from prashne.core.write_buffer import WriteBehindBuffer, is_permanent_error
+
+class APIError(Exception):
+    def __init__(self, code):
+        super().__init__(f"error {code}")
+        self.code = code
+
+class StubTable:
+    """
+    Stands in for supabase_admin.table(...): upserts into `rows` keyed on the conflict
+    columns, raising for rows marked `bad` (FK violation) or while `down`.
+    """
+
+    def __init__(self):
+        self.rows = {}
+        self.calls = 0
+        self.down = False
+        self._batch = None
+
+    def upsert(self, rows, on_conflict=None):
+        self._batch = (rows, on_conflict)
+        return self
+
+    def execute(self):
+        self.calls += 1
+        rows, on_conflict = self._batch
+        if self.down:
+            raise ConnectionError("Supabase unreachable")
+        if any(r.get("bad") for r in rows):
+            raise APIError("23503")
+        keys = [k.strip() for k in on_conflict.split(",")]
+        for r in rows:
+            self.rows[tuple(r[k] for k in keys)] = r
+
+@pytest.fixture
+def table(monkeypatch):
+    stub = StubTable()
+    monkeypatch.setattr(write_buffer.supabase_admin, "table", lambda name: stub)
+    return stub
+
+@pytest.fixture
+def buffer(tmp_path, table):
+    b = WriteBehindBuffer("matches", on_conflict="job_id,resume_id")
+    b.journal_path = str(tmp_path / "matches.jsonl")
+    b.dead_letter_path = str(tmp_path / "matches.dead.jsonl")
+    b.max_rows = 8
+    b.max_retries = 0
+    return b
+
+def match(resume_id, score=50, **extra):
+    return {"job_id": "j1", "resume_id": resume_id, "match_score": score, **extra}
+
+def test_is_permanent_error():
+    assert is_permanent_error(APIError("23503"))     # FK violation
+    assert is_permanent_error(APIError("22P02"))     # invalid input syntax
+    assert is_permanent_error(APIError("42703"))     # undefined column
+    assert is_permanent_error(APIError("PGRST204"))  # unknown column in payload
+    assert not is_permanent_error(APIError("PGRST001"))  # connection pool
+    assert not is_permanent_error(APIError("57014"))     # statement timeout
+    assert not is_permanent_error(ConnectionError("reset"))
+
+def test_dedupe_keeps_latest_row_per_conflict_key(buffer):
+    rows = buffer._dedupe([match("r1", 10), match("r2"), match("r1", 90)])
+    assert sorted((r["resume_id"], r["match_score"]) for r in rows) == [("r1", 90), ("r2", 50)]
+
+def test_bisection_isolates_rejected_rows(buffer, table):
+    rows = [match(f"r{i}", bad=i in (2, 5)) for i in range(8)]
+    rejected = []
+    assert buffer._write_rows(rows, rejected) == []
+    assert sorted(k[1] for k in table.rows) == ["r0", "r1", "r3", "r4", "r6", "r7"]
+    assert [row["resume_id"] for row, _ in rejected] == ["r2", "r5"]
+    with open(buffer.dead_letter_path) as f:
+        assert [json.loads(line)["row"]["resume_id"] for line in f] == ["r2", "r5"]
+
+def test_flush_reports_rejected_rows(buffer, table):
+    buffer.add_many([match("r1"), match("r2", bad=True)])
+    result = buffer.flush()
+    assert result.ok
+    assert [row["resume_id"] for row, _ in result.rejected] == ["r2"]
+
+def test_unavailable_rows_are_journaled_and_replayed_first(buffer, table):
+    table.down = True
+    buffer.add(match("r1", 10))
+    assert not buffer.flush().ok
+
+    table.down = False
+    buffer.add(match("r1", 90))
+    assert buffer.flush().ok
+    # The journaled 10 lands before the newer 90, never over it
+    assert table.rows[("j1", "r1")]["match_score"] == 90
+
+def test_replay_skips_blocked_rows(buffer, table):
+    table.down = True
+    buffer.add_many([match("r1"), match("r2")])
+    buffer.flush()
+    table.down = False
+
+    buffer.block("resume_id", ["r1"])
+    buffer.add(match("r3"))
+    buffer.flush()
+    assert sorted(k[1] for k in table.rows) == ["r2", "r3"]
+
+def test_replay_waits_while_supabase_is_down(buffer, table):
+    table.down = True
+    buffer.add(match("r1"))
+    buffer.flush()
+    calls = table.calls
+    buffer.add(match("r2"))
+    assert not buffer.flush().ok
+    # Only the replay attempt hit Supabase; the fresh row was queued behind it
+    assert table.calls == calls + 1
+    with open(buffer.journal_path) as f:
+        assert [json.loads(line)["resume_id"] for line in f] == ["r1", "r2"]